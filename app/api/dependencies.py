@@ -0,0 +1,39 @@
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, Request
+
+from app.core.conversation_manager import ConversationManager
+from app.services.llm_service import LLMService
+from app.services.menu_service import MenuService
+from app.services.rag_service import RAGService
+
+# Shared services live on app.state (set once in lifespan) so each request
+# resolves them with a single attribute lookup.
+async def get_conversation_manager(request: Request) -> ConversationManager:
+    conversation_manager = getattr(request.app.state, "conversation_manager", None)
+    if conversation_manager is None:
+        raise HTTPException(status_code=503, detail="Conversation service not initialized")
+    return conversation_manager
+
+async def get_llm_service(request: Request) -> LLMService:
+    llm_service = getattr(request.app.state, "llm_service", None)
+    if llm_service is None:
+        raise HTTPException(status_code=503, detail="LLM service not initialized")
+    return llm_service
+
+async def get_menu_service(request: Request) -> MenuService:
+    menu_service = getattr(request.app.state, "menu_service", None)
+    if menu_service is None:
+        raise HTTPException(status_code=503, detail="Menu service not initialized")
+    return menu_service
+
+async def get_rag_service(request: Request) -> RAGService:
+    rag_service = getattr(request.app.state, "rag_service", None)
+    if rag_service is None:
+        raise HTTPException(status_code=503, detail="RAG service not initialized")
+    return rag_service
+
+ConversationManagerDep = Annotated[ConversationManager, Depends(get_conversation_manager)]
+LLMServiceDep = Annotated[LLMService, Depends(get_llm_service)]
+MenuServiceDep = Annotated[MenuService, Depends(get_menu_service)]
+RAGServiceDep = Annotated[RAGService, Depends(get_rag_service)]
@@ -1,20 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException
 from typing import Dict, Any
 from loguru import logger
 
-from app.services.menu_service import MenuService
-from app.services.llm_service import LLMService
+from app.api.dependencies import LLMServiceDep, MenuServiceDep
 
 router = APIRouter()
 
-def get_menu_service():
-    return MenuService()
-
-def get_llm_service():
-    return LLMService()
-
 @router.get("/health")
-async def admin_health_check():
+async def admin_health_check(
+    menu_service: MenuServiceDep,
+    llm_service: LLMServiceDep
+):
     """Comprehensive health check for admin"""
     health_status = {
         "status": "healthy",
@@ -24,7 +20,6 @@ async def admin_health_check():
     
     try:
         # Check menu service
-        menu_service = MenuService()
         menu_items = await menu_service.get_all_items()
         health_status["services"]["menu_service"] = {
             "status": "healthy",
@@ -39,7 +34,6 @@ async def admin_health_check():
 
     try:
         # Check LLM service via provider health
-        llm_service = LLMService()
         providers = await llm_service.health_check()
         health_status["services"]["llm_service"] = {
             "status": "healthy" if any(providers.values()) else "degraded",
@@ -53,14 +47,14 @@ async def admin_health_check():
         }
         health_status["status"] = "degraded"
 
-    from datetime import datetime
-    health_status["timestamp"] = datetime.utcnow().isoformat()
+    from app.models.schemas import utc_now
+    health_status["timestamp"] = utc_now().isoformat()
     
     return health_status
 
 @router.get("/stats")
 async def get_system_stats(
-    menu_service: MenuService = Depends(get_menu_service)
+    menu_service: MenuServiceDep
 ):
     """Get system statistics"""
     try:
@@ -80,12 +74,12 @@ async def get_system_stats(
 
 @router.post("/test-llm")
 async def test_llm_connection(
-    test_message: str = "Hello, this is a test message.",
-    llm_service: LLMService = Depends(get_llm_service)
+    llm_service: LLMServiceDep,
+    test_message: str = "Hello, this is a test message."
 ):
     """Test LLM connection and response"""
     try:
-        result = await llm_service.generate_response(test_message)
+        result = await llm_service.generate_response(test_message, use_cache=False)
         return {
             "status": "success",
             "model": llm_service.model,
@@ -1,42 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from pydantic import BaseModel
 from loguru import logger
 import time
 import os
 
 from app.models.schemas import (
     ConversationRequest, StartConversationRequest, 
-    ChatResponse, ChatMessage, UserPreferences
+    ChatRequest, ChatResponse, ChatMessage
 )
+from app.api.dependencies import ConversationManagerDep, LLMServiceDep
 
 router = APIRouter()
 
-# Import global services from main.py - no duplicate creation
-def get_conversation_manager():
-    from app.main import conversation_manager
-    if conversation_manager is None:
-        raise HTTPException(status_code=503, detail="Conversation service not initialized")
-    return conversation_manager
-
-def get_llm_service():
-    from app.main import llm_service
-    if llm_service is None:
-        raise HTTPException(status_code=503, detail="LLM service not initialized")
-    return llm_service
-
-def get_menu_service():
-    from app.main import menu_service
-    if menu_service is None:
-        raise HTTPException(status_code=503, detail="Menu service not initialized")
-    return menu_service
-
-# Chat Request Schema
-class ChatRequest(BaseModel):
-    message: str
-    session_id: Optional[str] = None
-    preferences: Optional[UserPreferences] = None
-
 LOGS_DIR = os.path.join(os.getcwd(), "logs")
 SESSIONS_LOG_FILE = os.path.join(LOGS_DIR, "active_sessions.log")
 
@@ -53,7 +29,7 @@ def log_active_sessions(session_ids):
 @router.post("/start", response_model=ChatResponse)
 async def start_conversation(
     request: StartConversationRequest,
-    conv_manager = Depends(get_conversation_manager)
+    conv_manager: ConversationManagerDep
 ):
     """Start a new conversation session"""
     try:
@@ -71,10 +47,37 @@ async def start_conversation(
         logger.error(f"Start conversation error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to start conversation: {str(e)}")
 
+@router.post("/start/stream")
+async def start_conversation_stream(
+    request: StartConversationRequest,
+    conv_manager: ConversationManagerDep
+):
+    """
+    Start a new conversation session, streaming the welcome message as
+    server-sent events and ending with the ChatResponse as a "response" event
+    """
+    async def event_stream():
+        try:
+            async for kind, payload in conv_manager.stream_start_conversation(
+                preferences=request.preferences
+            ):
+                if kind == "chunk":
+                    yield _sse_event(payload)
+                else:
+                    logger.info(f"Started new session: {payload.session_id}")
+                    log_active_sessions(list(conv_manager.sessions.keys()))
+                    yield _sse_event(payload.model_dump_json(), event="response")
+            yield _sse_event("", event="done")
+        except Exception as e:
+            logger.opt(exception=e).error("Start conversation stream error: {}", e)
+            yield _sse_event("Failed to start conversation", event="error")
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @router.post("/message", response_model=ChatResponse)
 async def send_message(
     request: ChatRequest,
-    conv_manager = Depends(get_conversation_manager)
+    conv_manager: ConversationManagerDep
 ):
     """Send a message to the assistant"""
     try:
@@ -117,7 +120,7 @@ async def send_message(
 @router.get("/history/{session_id}", response_model=List[ChatMessage])
 async def get_chat_history(
     session_id: str,
-    conv_manager = Depends(get_conversation_manager)
+    conv_manager: ConversationManagerDep
 ):
     """Get chat history for a session"""
     try:
@@ -132,7 +135,7 @@ async def get_chat_history(
 @router.delete("/session/{session_id}")
 async def end_conversation(
     session_id: str,
-    conv_manager = Depends(get_conversation_manager)
+    conv_manager: ConversationManagerDep
 ):
     """End a session and clean up resources"""
     try:
@@ -149,7 +152,7 @@ async def end_conversation(
 @router.post("/", response_model=dict)
 async def chat(
     request: ChatRequest,
-    llm_service = Depends(get_llm_service)
+    llm_service: LLMServiceDep
 ):
     """Direct chat endpoint (fallback)"""
     start_time = time.time()
@@ -158,7 +161,7 @@ async def chat(
         # Try Gemini first, fallback to Ollama if needed
         result = await llm_service.generate_response(
             prompt=request.message,
-            use_fallback=True  # Always allow fallback
+            use_fallback=request.use_fallback
         )
         
         processing_time = time.time() - start_time
@@ -175,6 +178,65 @@ async def chat(
         logger.error(f"Chat endpoint error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to process chat request: {str(e)}")
 
+def _sse_event(data: str, event: Optional[str] = None) -> str:
+    """Format a chunk as a server-sent event (multi-line data is split per spec)"""
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    llm_service: LLMServiceDep
+):
+    """Direct chat endpoint that streams the reply as server-sent events"""
+    async def event_stream():
+        try:
+            async for chunk in llm_service.stream_response(
+                request.message, use_fallback=request.use_fallback
+            ):
+                yield _sse_event(chunk)
+            yield _sse_event("", event="done")
+        except Exception as e:
+            logger.opt(exception=e).error("Chat stream error: {}", e)
+            yield _sse_event("Failed to process chat request", event="error")
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@router.post("/message/stream")
+async def send_message_stream(
+    request: ChatRequest,
+    conv_manager: ConversationManagerDep
+):
+    """
+    Send a message to the assistant and stream the reply as server-sent events:
+    the reply's message text as it is generated, then the final ChatResponse
+    as a "response" event
+    """
+    if not request.session_id:
+        raise HTTPException(status_code=400, detail="Session ID is required")
+    if request.session_id not in conv_manager.sessions:
+        logger.warning(f"Session {request.session_id} not found in active sessions")
+        raise HTTPException(status_code=404, detail=f"Session {request.session_id} not found")
+
+    async def event_stream():
+        try:
+            async for kind, payload in conv_manager.stream_message(
+                message=request.message,
+                session_id=request.session_id,
+                preferences=request.preferences
+            ):
+                if kind == "chunk":
+                    yield _sse_event(payload)
+                else:
+                    yield _sse_event(payload.model_dump_json(), event="response")
+            yield _sse_event("", event="done")
+        except Exception as e:
+            logger.opt(exception=e).error("Message stream error: {}", e)
+            yield _sse_event("Failed to process message", event="error")
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint for chat routes"""
@@ -184,9 +246,12 @@ async def health_check():
         "providers": ["gemini", "ollama"],
         "routes": [
             "/start",
+            "/start/stream",
             "/message", 
+            "/message/stream",
             "/history/{session_id}",
             "/session/{session_id}",
-            "/"
+            "/",
+            "/stream"
         ]
     }
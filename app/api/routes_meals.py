@@ -8,6 +8,7 @@ from app.models.schemas import (
     MealRecommendation, OrderRequest, OrderResponse
 )
 from app.models.schemas import MenuItem
+from app.api.dependencies import get_menu_service
 from app.services.menu_service import MenuService
 from app.core.meal_selector import MealSelector
 from app.core.allergy_checker import AllergyChecker
@@ -15,10 +16,7 @@ from app.core.offer_engine import OfferEngine
 
 router = APIRouter()
 
-# Dependency Providers
-def get_menu_service() -> MenuService:
-    return MenuService()
-
+# Dependency Providers (the MenuService itself is shared app-wide)
 def get_meal_selector(menu_service: MenuService = Depends(get_menu_service)) -> MealSelector:
     return MealSelector(menu_service)
 
@@ -1,9 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, HTTPException
 from typing import Dict, Any, Optional
 from pydantic import BaseModel
 
-from app.services.rag_service import RAGService
-from app.services.menu_service import MenuService
+from app.api.dependencies import RAGServiceDep
 from app.config import settings
 
 router = APIRouter(prefix="/qa", tags=["Q&A"])
@@ -17,16 +16,10 @@ class QAPairRequest(BaseModel):
     answer: str
     category: Optional[str] = None
 
-def get_menu_service() -> MenuService:
-    return MenuService()
-
-def get_rag_service(menu_service: MenuService = Depends(get_menu_service)) -> RAGService:
-    return RAGService(menu_service)
-
 @router.post("/ask")
 async def ask_question(
     request: QuestionRequest,
-    rag_service: RAGService = Depends(get_rag_service)
+    rag_service: RAGServiceDep
 ) -> Dict[str, Any]:
     """
     Ask a question about the menu and get an answer
@@ -46,7 +39,7 @@ async def ask_question(
 @router.post("/add-qa")
 async def add_qa_pair(
     request: QAPairRequest,
-    rag_service: RAGService = Depends(get_rag_service)
+    rag_service: RAGServiceDep
 ) -> Dict[str, str]:
     """
     Add a new Q&A pair to the knowledge base
@@ -66,7 +59,7 @@ async def add_qa_pair(
 
 @router.post("/update-embeddings")
 async def update_embeddings(
-    rag_service: RAGService = Depends(get_rag_service)
+    rag_service: RAGServiceDep
 ) -> Dict[str, str]:
     """
     Update menu item embeddings
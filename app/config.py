@@ -26,7 +26,23 @@ class Settings(BaseSettings):
     use_ollama_fallback: bool = True
     max_retries: int = 3
     timeout_seconds: int = 30
-    fallback_threshold_errors: int = 2  # Switch to fallback after N consecutive errors
+    fallback_threshold_errors: int = 2  # Open a provider's circuit after N errors in the window...
+    circuit_failure_rate: float = 0.5  # ...that are at least this share of its calls there
+    circuit_window_seconds: float = 60.0  # Sliding window the two above are measured over
+    circuit_recovery_seconds: float = 30.0  # First OPEN cooldown; doubles on each re-open
+    circuit_max_recovery_seconds: float = 300.0
+    hedge_after_ms: int = 1500  # Start Ollama alongside Gemini if no answer by then (~1.5x p50)
+    race_providers_enabled: bool = False  # Let latency-critical calls (race=True) start both at once
+    
+    # Proactive request-rate limits per provider (requests per minute)
+    gemini_requests_per_minute: int = 60
+    ollama_requests_per_minute: int = 600
+    
+    # Per-call provider deadlines (seconds)
+    gemini_timeout_seconds: float = 20.0
+    ollama_timeout_seconds: float = 60.0
+    ollama_connect_timeout_seconds: float = 5.0
+    stream_idle_timeout_seconds: float = 30.0  # Max gap between streamed chunks once output has started
     
     # API settings
     HOST: str = "0.0.0.0"
@@ -51,9 +67,27 @@ class Settings(BaseSettings):
     # LLM Performance Settings
     max_tokens: Optional[int] = 1000
     temperature: float = 0.7
+    menu_prompt_max_items: int = 25  # Larger menus are pruned to the most relevant items
+    max_history_turns: int = 10  # Older conversation turns are left out of the prompt
+    
+    # LLM Response Cache Settings
+    llm_cache_max_size: int = 1024
+    llm_cache_ttl_seconds: int = 600
+    # Paraphrase matching needs the optional sentence-transformers package
+    semantic_cache_enabled: bool = False
+    semantic_cache_model: str = "all-MiniLM-L6-v2"
+    semantic_cache_threshold: float = 0.95  # Strict: a hit stands in for a Gemini call
+    semantic_cache_max_entries: int = 2048
+    
+    # Ollama Concurrency Settings
+    ollama_max_concurrency: int = 4  # Match the server's OLLAMA_NUM_PARALLEL
+    ollama_max_connections: int = 100
+    ollama_max_keepalive_connections: int = 50
+    ollama_keepalive_expiry_seconds: float = 30.0  # Drop idle connections before the server does
     
     # Health Check Settings
     health_check_interval_minutes: int = 5
+    health_check_timeout_seconds: float = 5.0
     gemini_health_endpoint: Optional[str] = None
     
     # Retry Settings (for tenacity)
@@ -1,11 +1,10 @@
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 import uuid
-from datetime import datetime
 from loguru import logger
 
 from app.models.schemas import (
     ChatMessage, ChatResponse, UserPreferences,
-    MenuItem, MealRecommendation
+    MenuItem, MealRecommendation, utc_now
 )
 from app.services.llm_service import LLMService
 from app.services.menu_service import MenuService
@@ -42,37 +41,79 @@ class ConversationManager:
         preferences: Optional[UserPreferences] = None
     ) -> ChatResponse:
         """Start a new conversation session"""
+        session_id, session = await self._create_session(preferences)
+        recommendation = self._recommendation_response(session_id, session)
+        if recommendation is not None:
+            return recommendation
+
+        # Generate welcome message
+        welcome_message = await self.llm_service.generate_welcome_message(
+            preferences=preferences
+        )
+        return self._welcome_response(session_id, welcome_message)
+
+    async def stream_start_conversation(
+        self,
+        preferences: Optional[UserPreferences] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of start_conversation. Yields ("chunk", text) as the
+        welcome message is generated, then a final ("response", ChatResponse).
+        """
+        session_id, session = await self._create_session(preferences)
+        recommendation = self._recommendation_response(session_id, session)
+        if recommendation is not None:
+            yield "response", recommendation
+            return
+
+        parts: List[str] = []
+        async for chunk in self.llm_service.stream_welcome_message(preferences=preferences):
+            parts.append(chunk)
+            yield "chunk", chunk
+        yield "response", self._welcome_response(session_id, "".join(parts))
+
+    async def _create_session(
+        self,
+        preferences: Optional[UserPreferences]
+    ) -> Tuple[str, Dict[str, Any]]:
         session_id = str(uuid.uuid4())
         
         # Initialize session data
+        session_preferences = preferences or UserPreferences()
         self.active_sessions[session_id] = {
             "messages": [],
-            "preferences": preferences or UserPreferences(),
-            "start_time": datetime.utcnow()
+            "preferences": session_preferences,
+            "preferences_key": session_preferences.model_dump_json(),
+            "start_time": utc_now()
         }
 
         session = self.active_sessions[session_id]
         await self._update_filtered_meals(session)
-        if session["filtered_meals"]:
-            meal = session["filtered_meals"][0].meal
-            response_message = (
-                f"I recommend the {meal.name}: {meal.description} (${meal.price}). "
-                "Would you like to order this, add it to your order, or see more options? "
-                "Just reply 'order' to confirm, or let me know if you want something else."
-            )
-            return ChatResponse(
-                message=response_message,
-                session_id=session_id,
-                suggested_meals=[rec.meal for rec in session["filtered_meals"]],
-                follow_up_questions=["Would you like to order this meal, add a side, or see more options?"],
-                metadata=None
-            )
+        return session_id, session
 
-        # Generate welcome message
-        welcome_message = await self.llm_service.generate_welcome_message(
-            preferences=preferences
+    def _recommendation_response(
+        self,
+        session_id: str,
+        session: Dict[str, Any]
+    ) -> Optional[ChatResponse]:
+        """Open with the best filtered meal when the preferences already allow it"""
+        if not session["filtered_meals"]:
+            return None
+        meal = session["filtered_meals"][0].meal
+        response_message = (
+            f"I recommend the {meal.name}: {meal.description} (${meal.price}). "
+            "Would you like to order this, add it to your order, or see more options? "
+            "Just reply 'order' to confirm, or let me know if you want something else."
+        )
+        return ChatResponse(
+            message=response_message,
+            session_id=session_id,
+            suggested_meals=[rec.meal for rec in session["filtered_meals"]],
+            follow_up_questions=["Would you like to order this meal, add a side, or see more options?"],
+            metadata=None
         )
 
+    def _welcome_response(self, session_id: str, welcome_message: str) -> ChatResponse:
         return ChatResponse(
             message=welcome_message,
             session_id=session_id,
@@ -90,21 +131,94 @@ class ConversationManager:
         preferences: Optional[UserPreferences] = None
     ) -> ChatResponse:
         """Process a user message and generate a response"""
+        session = await self._begin_turn(message, session_id, preferences)
+
+        quick_response = await self._quick_response(session, session_id, message)
+        if quick_response is not None:
+            return quick_response
+
+        # --- OTHERWISE, USE LLM FOR NEXT STEP ---
+        logger.info(f"Calling LLM with message: {message}")
+        logger.info(f"Session preferences: {session['preferences']}")
+        logger.info(f"Chat history: {session['messages']}")
+        try:
+            llm_response = await self.llm_service.process_message(
+                message=message,
+                context=session["messages"],
+                preferences=session["preferences"]
+            )
+            logger.info(f"Raw LLM response: {llm_response}")
+        except Exception as llm_error:
+            logger.error(f"LLM service error in process_message: {str(llm_error)}", exc_info=True)
+            raise llm_error
+
+        return await self._complete_llm_turn(session, session_id, message, llm_response)
+
+    async def stream_message(
+        self,
+        message: str,
+        session_id: str,
+        preferences: Optional[UserPreferences] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of process_message. Yields ("chunk", text) while the
+        LLM is generating, then a final ("response", ChatResponse). Turns that
+        are answered without the main LLM call yield only the response.
+        """
+        session = await self._begin_turn(message, session_id, preferences)
+
+        quick_response = await self._quick_response(session, session_id, message)
+        if quick_response is not None:
+            yield "response", quick_response
+            return
+
+        llm_response: Dict[str, Any] = {}
+        async for kind, payload in self.llm_service.stream_process_message(
+            message=message,
+            context=session["messages"],
+            preferences=session["preferences"]
+        ):
+            if kind == "chunk":
+                yield kind, payload
+            else:
+                llm_response = payload
+
+        yield "response", await self._complete_llm_turn(session, session_id, message, llm_response)
+
+    async def _begin_turn(
+        self,
+        message: str,
+        session_id: str,
+        preferences: Optional[UserPreferences]
+    ) -> Dict[str, Any]:
+        """Validate the session, apply new preferences and record the user message"""
         if session_id not in self.active_sessions:
             raise ValueError("Invalid session ID")
 
         session = self.active_sessions[session_id]
         
-        # Update preferences if provided
+        # Update preferences if provided; clients resend the same preferences on
+        # every message, so only re-run meal filtering when they actually change
         if preferences:
-            logger.info(f"Received preferences: {preferences}")
-            session["preferences"] = preferences
-            await self._update_filtered_meals(session)
+            preferences_key = preferences.model_dump_json()
+            if preferences_key != session.get("preferences_key"):
+                logger.info(f"Received preferences: {preferences}")
+                session["preferences"] = preferences
+                session["preferences_key"] = preferences_key
+                await self._update_filtered_meals(session)
         # Add user message to history
         session["messages"].append(
             ChatMessage(role="user", content=message)
         )
+        return session
 
+    async def _quick_response(
+        self,
+        session: Dict[str, Any],
+        session_id: str,
+        message: str
+    ) -> Optional[ChatResponse]:
+        """Answer from the session's filtered meals when possible, else None"""
         # Track which recommendation index has been shown
         if "shown_index" not in session:
             session["shown_index"] = 0
@@ -184,21 +298,17 @@ class ConversationManager:
                 metadata=None
             )
 
-        # --- OTHERWISE, USE LLM FOR NEXT STEP ---
-        logger.info(f"Calling LLM with message: {message}")
-        logger.info(f"Session preferences: {session['preferences']}")
-        logger.info(f"Chat history: {session['messages']}")
-        try:
-            llm_response = await self.llm_service.process_message(
-                message=message,
-                context=session["messages"],
-                preferences=session["preferences"]
-            )
-            logger.info(f"Raw LLM response: {llm_response}")
-        except Exception as llm_error:
-            logger.error(f"LLM service error in process_message: {str(llm_error)}", exc_info=True)
-            raise llm_error
 
+        return None
+
+    async def _complete_llm_turn(
+        self,
+        session: Dict[str, Any],
+        session_id: str,
+        message: str,
+        llm_response: Dict[str, Any]
+    ) -> ChatResponse:
+        """Add recommendations and follow-ups to an LLM reply and record it"""
         # Get meal recommendations if appropriate
         suggested_meals = None
         if llm_response.get("should_recommend_meals", False):
@@ -223,12 +333,16 @@ class ConversationManager:
         )
 
         # Create response
+        metadata = llm_response.get("metadata") or {}
         response = ChatResponse(
             message=llm_response["message"],
             session_id=session_id,
             suggested_meals=suggested_meals,
             follow_up_questions=follow_up_questions,
-            metadata=llm_response.get("metadata")
+            metadata=llm_response.get("metadata"),
+            provider=metadata.get("provider_used"),
+            fallback_used=metadata.get("fallback_used"),
+            processing_time=metadata.get("response_time")
         )
 
         # Add assistant response to history
@@ -257,7 +371,7 @@ class ConversationManager:
         session = self.active_sessions[session_id]
         logger.info(
             f"Ending conversation session {session_id}",
-            duration=datetime.utcnow() - session["start_time"],
+            duration=utc_now() - session["start_time"],
             message_count=len(session["messages"])
         )
         
@@ -334,14 +448,3 @@ def preferences_are_sufficient(preferences: UserPreferences) -> bool:
     if preferences.dislikes:
         count += 1
     return count >= 3
-
-# Create service instances ONCE at module level
-llm_service_instance = LLMService()
-menu_service_instance = MenuService()
-conversation_manager_instance = ConversationManager(
-    llm_service=llm_service_instance,
-    menu_service=menu_service_instance
-)
-
-def get_conversation_manager():
-    return conversation_manager_instance
@@ -1,43 +1,65 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from loguru import logger
 import uvicorn
 from contextlib import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
 from starlette.routing import Route, Mount
 
-from app.api import routes_chat, routes_meals, routes_admin
-from app.core.conversation_manager import ConversationManager
-from app.services.llm_service import LLMService
-from app.services.menu_service import MenuService
 from app.config import settings
-from typing import Optional, Dict, Any
+from typing import Dict, Any
 import os
+import sys
 from pathlib import Path
 
-# Global services - initialized once in lifespan
-llm_service: Optional[LLMService] = None
-menu_service: Optional[MenuService] = None
-conversation_manager: Optional[ConversationManager] = None
+def _register_routes(app: FastAPI):
+    """Import and include API routers (deferred to keep module import cheap)"""
+    # The lifespan can run more than once per app (e.g. repeated TestClient use)
+    if getattr(app.state, "routes_registered", False):
+        return
+
+    from app.api import routes_chat, routes_meals, routes_admin, routes_qa
+
+    app.include_router(routes_chat.router, prefix="/api/chat", tags=["chat"])
+    app.include_router(routes_meals.router, prefix="/api/meals", tags=["meals"])
+    app.include_router(routes_admin.router, prefix="/api/admin", tags=["admin"])
+    app.include_router(routes_qa.router, prefix="/api")
+    app.state.routes_registered = True
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global llm_service, menu_service, conversation_manager
     logger.info("🚀 Starting Restaurant AI Assistant...")
 
+    # Routers must be included before the first request is served
+    _register_routes(app)
+
     try:
+        from app.core.conversation_manager import ConversationManager
+        from app.services.llm_service import LLMService
+        from app.services.menu_service import MenuService
+        from app.services.rag_service import RAGService
+
         # Initialize services
         llm_service = LLMService()
         logger.info(f"✅ LLM Service initialized with model: {llm_service.model}")
 
-        menu_service = MenuService()
+        menu_service = await MenuService.create()
         items = await menu_service.get_all_items()
         logger.info(f"✅ Menu Service initialized with {len(items)} items")
 
+        rag_service = RAGService(menu_service)
+        logger.info("✅ RAG Service initialized")
+
         conversation_manager = ConversationManager(llm_service, menu_service)
         logger.info("✅ Conversation Manager initialized")
 
+        # Services are shared app-wide via app.state (see app/api/dependencies.py)
+        app.state.llm_service = llm_service
+        app.state.menu_service = menu_service
+        app.state.rag_service = rag_service
+        app.state.conversation_manager = conversation_manager
+
         logger.info("🎉 Restaurant AI Assistant started successfully!")
         
         # Test route registration - Fixed to handle different route types
@@ -56,6 +78,7 @@ async def lifespan(app: FastAPI):
     yield
 
     logger.info("🛑 Shutting down Restaurant AI Assistant...")
+    await app.state.llm_service.aclose()
 
 
 # Initialize FastAPI app
@@ -63,7 +86,8 @@ app = FastAPI(
     title="Restaurant AI Assistant",
     description="An intelligent restaurant chatbot system that helps customers find the perfect meal",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS - Fixed for development
@@ -75,27 +99,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global dependency functions
-def get_conversation_manager():
-    if conversation_manager is None:
-        raise HTTPException(status_code=503, detail="Conversation Manager not initialized")
-    return conversation_manager
-
-def get_menu_service():
-    if menu_service is None:
-        raise HTTPException(status_code=503, detail="Menu Service not initialized")
-    return menu_service
-
-def get_llm_service():
-    if llm_service is None:
-        raise HTTPException(status_code=503, detail="LLM Service not initialized")
-    return llm_service
-
-# Include routers AFTER defining dependency functions
-app.include_router(routes_chat.router, prefix="/api/chat", tags=["chat"])
-app.include_router(routes_meals.router, prefix="/api/meals", tags=["meals"])
-app.include_router(routes_admin.router, prefix="/api/admin", tags=["admin"])
-
 # Mount static files directory
 try:
     app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -112,38 +115,43 @@ async def root():
             "chat": "/api/chat",
             "meals": "/api/meals", 
             "admin": "/api/admin",
+            "qa": "/api/qa",
             "docs": "/docs"
         }
     }
 
 @app.get("/health")
-async def health():
+async def health(request: Request):
     """Health check endpoint"""
+    state = request.app.state
     return {
         "status": "healthy",
         "services": {
-            "llm": llm_service is not None,
-            "menu": menu_service is not None,
-            "conversation": conversation_manager is not None
+            "llm": getattr(state, "llm_service", None) is not None,
+            "menu": getattr(state, "menu_service", None) is not None,
+            "rag": getattr(state, "rag_service", None) is not None,
+            "conversation": getattr(state, "conversation_manager", None) is not None
         }
     }
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Global exception handler for HTTP exceptions"""
-    logger.error(f"HTTP error occurred: {exc.detail} - Path: {request.url.path}")
-    return JSONResponse(
+    path = request.scope["path"]
+    logger.error("HTTP error occurred: {} - Path: {}", exc.detail, path)
+    return ORJSONResponse(
         status_code=exc.status_code,
-        content={"message": exc.detail, "path": str(request.url.path)}
+        content={"message": exc.detail, "path": path}
     )
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """Global exception handler for all exceptions"""
-    logger.error(f"Unexpected error: {str(exc)} - Path: {request.url.path}", exc_info=True)
-    return JSONResponse(
+    path = request.scope["path"]
+    logger.opt(exception=exc).error("Unexpected error: {} - Path: {}", exc, path)
+    return ORJSONResponse(
         status_code=500,
-        content={"message": "Internal server error", "path": str(request.url.path)}
+        content={"message": "Internal server error", "path": path}
     )
 
 if __name__ == "__main__":
@@ -156,5 +164,8 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
-        log_level="info"
+        log_level="info",
+        # uvloop/httptools are C-accelerated; uvloop is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
     )
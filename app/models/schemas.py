@@ -1,8 +1,11 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
 class MessageRole(str, Enum):
     USER = "user"
     ASSISTANT = "assistant"
@@ -43,6 +46,9 @@ class CuisineType(str, Enum):
     OTHER = "other"
 
 class UserPreferences(BaseModel):
+    # Immutable so a parsed instance can be safely reused across requests
+    model_config = ConfigDict(frozen=True)
+
     dietary_restrictions: List[DietaryRestriction] = []
     allergies: List[str] = []
     price_range: Optional[tuple[float, float]] = None
@@ -69,6 +75,7 @@ class MenuItem(BaseModel):
     is_vegan: bool
     is_gluten_free: bool
     is_dairy_free: bool
+    dietary_tags: List[str] = []
     image_url: Optional[str] = None
     thumbnail_url: Optional[str] = None  # Add this for thumbnails
     cloudinary_id: Optional[str] = None  # Add this to track Cloudinary ID
@@ -78,7 +85,7 @@ class MenuItem(BaseModel):
 class ChatMessage(BaseModel):
     role: str  # "user" or "assistant"
     content: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
     metadata: Optional[Dict[str, Any]] = None
 
 class ChatResponse(BaseModel):
@@ -87,7 +94,10 @@ class ChatResponse(BaseModel):
     suggested_meals: Optional[List[MenuItem]] = None
     follow_up_questions: Optional[List[str]] = None
     metadata: Optional[Dict[str, Any]] = None
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    provider: Optional[str] = None
+    fallback_used: Optional[bool] = None
+    processing_time: Optional[float] = None
+    timestamp: datetime = Field(default_factory=utc_now)
 
 class MealRecommendation(BaseModel):
     meal: MenuItem
@@ -123,6 +133,7 @@ class StartConversationRequest(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
-    session_id: str
-    preferences: Dict[str, Any]
-    context: Optional[List[Dict[str, Any]]] = None  # <-- Add this line if you need context
\ No newline at end of file
+    session_id: Optional[str] = None
+    preferences: Optional[UserPreferences] = None
+    context: Optional[List[Dict[str, Any]]] = None
+    use_fallback: bool = True
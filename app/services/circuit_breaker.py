@@ -0,0 +1,173 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from collections import deque
+from enum import Enum
+import time
+from loguru import logger
+
+T = TypeVar("T")
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the provider's circuit is open"""
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker.
+
+    CLOSED: calls pass through. It trips OPEN once the last `window_seconds`
+    hold at least `failure_threshold` failures making up at least
+    `failure_rate` of the calls, so an occasional success does not keep a
+    flaky provider in rotation.
+    OPEN: calls fail fast until the cooldown elapses. The cooldown doubles each
+    time the circuit re-opens, capped at `max_recovery_seconds`.
+    HALF_OPEN: exactly one probe call is let through; success closes the
+    circuit, failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        recovery_seconds: float,
+        max_recovery_seconds: float,
+        window_seconds: float = 60.0,
+        failure_rate: float = 0.5
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.max_recovery_seconds = max_recovery_seconds
+        self.window_seconds = window_seconds
+        self.failure_rate = failure_rate
+
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        # (monotonic time, succeeded) for each call within the window
+        self._outcomes: deque = deque()
+        self.opened_at = 0.0
+        self.consecutive_opens = 0
+        self.probe_inflight = False
+
+    def _cooldown(self) -> float:
+        """Current OPEN duration, with exponential backoff across re-opens"""
+        backoff = self.recovery_seconds * 2 ** max(0, self.consecutive_opens - 1)
+        return min(backoff, self.max_recovery_seconds)
+
+    def allows_request(self) -> bool:
+        """Whether a call made now would be let through"""
+        if self.state == CircuitState.CLOSED:
+            return True
+        if self.probe_inflight:
+            return False
+        return time.monotonic() - self.opened_at >= self._cooldown()
+
+    def _record(self, succeeded: bool):
+        """Add an outcome to the window, dropping those that have aged out"""
+        now = time.monotonic()
+        outcomes = self._outcomes
+        outcomes.append((now, succeeded))
+        if not succeeded:
+            self.failures += 1
+        while outcomes[0][0] < now - self.window_seconds:
+            if not outcomes.popleft()[1]:
+                self.failures -= 1
+
+    def record_success(self, probe: bool = False):
+        """
+        Record a successful call. Only the HALF_OPEN probe closes the circuit;
+        a call that started before the circuit opened does not.
+        """
+        if probe and self.state == CircuitState.HALF_OPEN:
+            logger.info(f"Circuit for {self.name} closed")
+            # A recovered provider starts with a clean window
+            self._clear()
+            self.state = CircuitState.CLOSED
+            self.consecutive_opens = 0
+        if self.state == CircuitState.CLOSED:
+            self._record(True)
+
+    def record_failure(self, probe: bool = False):
+        """
+        Record a failed call. A failed probe re-opens the circuit; calls that
+        were already in flight when it opened do not re-trip it.
+        """
+        if probe and self.state == CircuitState.HALF_OPEN:
+            self._trip()
+            return
+        if self.state != CircuitState.CLOSED:
+            return
+        self._record(False)
+        if (
+            self.failures >= self.failure_threshold
+            and self.failures >= self.failure_rate * len(self._outcomes)
+        ):
+            self._trip()
+
+    def _clear(self):
+        self._outcomes.clear()
+        self.failures = 0
+
+    def _trip(self):
+        self.state = CircuitState.OPEN
+        self.opened_at = time.monotonic()
+        self.consecutive_opens += 1
+        logger.warning(
+            f"Circuit for {self.name} opened after {self.failures} failures "
+            f"in {self.window_seconds:.0f}s (retry in {self._cooldown():.0f}s)"
+        )
+
+    def reset(self):
+        """Force the circuit back to CLOSED"""
+        self.state = CircuitState.CLOSED
+        self.consecutive_opens = 0
+        self.probe_inflight = False
+        self._clear()
+
+    def acquire(self) -> bool:
+        """
+        Admit a call, failing fast with CircuitOpenError when OPEN. Returns
+        whether the call is the HALF_OPEN probe; pass that to release().
+        """
+        if not self.allows_request():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        probing = self.state != CircuitState.CLOSED
+        if probing:
+            self.state = CircuitState.HALF_OPEN
+            self.probe_inflight = True
+        return probing
+
+    def release(self, probing: bool, error: Optional[BaseException] = None):
+        """Record the outcome of a call admitted by acquire()"""
+        if probing:
+            self.probe_inflight = False
+        if error is None:
+            self.record_success(probe=probing)
+        elif isinstance(error, Exception):
+            self.record_failure(probe=probing)
+        elif probing:
+            # Cancelled (e.g. a losing hedged request): not the provider's fault
+            self.state = CircuitState.OPEN
+
+    async def call(self, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """Run func through the breaker, failing fast with CircuitOpenError when OPEN"""
+        probing = self.acquire()
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            self.release(probing, e)
+            raise
+        self.release(probing)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "failures": self.failures,
+            "calls_in_window": len(self._outcomes),
+            "consecutive_opens": self.consecutive_opens
+        }
@@ -1,24 +1,45 @@
 import google.generativeai as genai
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Optional
 from app.config import settings
 from loguru import logger
 import re
 
+# Leading/trailing markdown code fences (optionally tagged ```json)
+_CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.MULTILINE)
+
 class GeminiService:
     def __init__(self):
         genai.configure(api_key=settings.gemini_api_key)
         self.model = genai.GenerativeModel(settings.gemini_model)
-        
-    async def generate(self, prompt: str, context: Optional[str] = None) -> str:
+        # Immutable per-process config, built once and shared by every call
+        self._gen_config = genai.types.GenerationConfig(
+            temperature=settings.temperature,
+            max_output_tokens=settings.max_tokens,
+        )
+
+    def _generation_config(self, response_schema: Optional[Dict[str, Any]] = None):
+        """Shared config, or a JSON-mode variant constrained to response_schema"""
+        if response_schema is None:
+            return self._gen_config
+        return genai.types.GenerationConfig(
+            temperature=settings.temperature,
+            max_output_tokens=settings.max_tokens,
+            response_mime_type="application/json",
+            response_schema=response_schema,
+        )
+
+    async def generate(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
         try:
             full_prompt = f"{context}\n\n{prompt}" if context else prompt
             
             response = await self.model.generate_content_async(
                 full_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=1000,
-                )
+                generation_config=self._generation_config(response_schema)
             )
             
             return response.text
@@ -27,6 +48,24 @@ class GeminiService:
             logger.error(f"Gemini generation failed: {e}")
             raise
 
+    async def stream(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Yield response text chunks as Gemini produces them"""
+        full_prompt = f"{context}\n\n{prompt}" if context else prompt
+
+        response = await self.model.generate_content_async(
+            full_prompt,
+            generation_config=self._generation_config(response_schema),
+            stream=True
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
 def clean_llm_json(text: str) -> str:
     # Remove code block markers and language tags
-    return re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip(), flags=re.MULTILINE)
\ No newline at end of file
+    return _CODE_FENCE_RE.sub("", text.strip())
\ No newline at end of file
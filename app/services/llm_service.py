@@ -1,24 +1,308 @@
-from typing import List, Dict, Any, Optional
-import json
+from typing import AsyncIterator, Awaitable, List, Dict, Any, Mapping, Optional, Set, Tuple
 import asyncio
+import copy
+import functools
+import hashlib
+import io
 import time
 import re
 import os
 from enum import Enum
+from types import MappingProxyType
+from collections import deque
 from dataclasses import dataclass
 from loguru import logger
-import ollama
-from tenacity import retry, stop_after_attempt, wait_exponential
+import orjson
+from aiolimiter import AsyncLimiter
+from cachetools import LRUCache, TTLCache
+from pydantic import BaseModel
 
 from app.config import settings
 from app.models.schemas import ChatMessage, UserPreferences
-from app.services.gemini_service import clean_llm_json
+from app.services.gemini_service import GeminiService, clean_llm_json
+from app.services.ollama_service import OllamaService
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.semantic_cache import SemanticCache
+from app.utils.helpers import load_json_cached
+
+# Static prompt skeletons. LLMService renders the fixed fields once and splits
+# them around the per-request slots (see _split_template)
+_WELCOME_PROMPT_TEMPLATE = """You are a friendly and knowledgeable restaurant AI assistant for {app_name}. 
+Your goal is to help customers find the perfect meal based on their preferences and needs.
+
+{preferences}
+
+Generate a warm welcome message that:
+1. Introduces yourself as the restaurant's AI assistant
+2. Acknowledges any provided preferences
+3. Invites the customer to start their dining experience
+4. Keeps the message concise and friendly
+
+Response:"""
+
+# Everything up to and including the menu is identical across requests and
+# comes first, so provider-side prefix caching (Gemini implicit caching,
+# Ollama's KV-cache reuse) can cover it; per-request content follows
+_PROCESS_PROMPT_TEMPLATE = """You are a friendly and knowledgeable restaurant AI assistant for {app_name}.
+Your goal is to help customers find the perfect meal based on their preferences and needs.
+
+ONLY recommend meals from the menu below. Use the menu properties (ingredients, allergens, dietary tags, nutrition, etc.) to answer questions and explain suitability for health conditions (e.g., ulcers, allergies). Do NOT invent new dishes.
+
+Generate a response to the user's latest message that:
+1. Addresses the user's message directly
+2. Maintains a friendly and helpful tone
+3. Provides relevant information about menu items if appropriate
+4. Asks follow-up questions to better understand their needs
+
+Format your response as a JSON object with the following structure:
+{{
+    "message": "Your response message",
+    "should_recommend_meals": true/false,
+    "context": {{
+        "intent": "user's intent (e.g., 'meal_recommendation', 'menu_inquiry', 'general_question')",
+        "key_preferences": ["list", "of", "key", "preferences", "mentioned"]
+    }}
+}}
+
+Menu:
+{menu}
+
+{preferences}
+
+Previous conversation:
+{history}
+
+User's latest message: {message}
+
+Response:"""
+
+# Structured-output schema for process_message (OpenAPI subset accepted by
+# Gemini's response_schema)
+_PROCESS_RESPONSE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "message": {"type": "string"},
+        "should_recommend_meals": {"type": "boolean"},
+        "context": {
+            "type": "object",
+            "properties": {
+                "intent": {"type": "string"},
+                "key_preferences": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["intent", "key_preferences"]
+        }
+    },
+    "required": ["message", "should_recommend_meals", "context"]
+}
+
+_FOLLOW_UP_PROMPT_TEMPLATE = """You are a restaurant AI assistant generating follow-up questions.
+
+User's message: {message}
+
+Context: {context}
+
+Suggested meals: {suggested_meals}
+
+Generate 2-3 relevant follow-up questions that will help:
+1. Better understand the user's preferences
+2. Narrow down meal recommendations
+3. Address any unclear aspects of their request
+
+Format your response as a JSON array of strings.
+
+Response:"""
+
+_MENU_HEADER = "Menu v{version}. Format: name|cuisine|category|price|diet=dietary tags|alg=allergens"
+
+_MENU_LINE_TEMPLATE = "{name}|{cuisine_type}|{category}|${price}|diet={dietary}|alg={allergens}"
+# Fallbacks so a sparse menu item still renders (replaces per-field .get calls)
+_MENU_LINE_DEFAULTS = {"name": "", "cuisine_type": "", "category": "", "price": ""}
+
+def _menu_sort_key(item: Mapping[str, Any]) -> Tuple[int, int, str]:
+    """Deterministic menu order: numeric ids numerically, then any others"""
+    item_id = str(item.get('id', ''))
+    return (0, int(item_id), "") if item_id.isdigit() else (1, 0, item_id)
+
+_WORD_RE = re.compile(r"[a-z]{3,}")
+_CALORIE_GOAL_RE = re.compile(r"under (\d+)\s*calories", re.IGNORECASE)
+_STOPWORDS = frozenset({
+    "the", "and", "with", "for", "you", "want", "have", "what", "any", "something",
+    "some", "like", "would", "can", "please", "recommend", "meal", "food", "dish"
+})
+
+def _split_template(template: str, slots: List[str], **fixed: Any) -> List[str]:
+    """
+    Render the fixed fields of template once and split it around the
+    per-request slots (in order), so each call is a single str.join
+    """
+    rendered = template.format(**fixed, **{slot: f"\x00{slot}\x00" for slot in slots})
+    return re.split("\x00(?:" + "|".join(slots) + ")\x00", rendered)
+
+def _keywords(text: str) -> frozenset:
+    return frozenset(_WORD_RE.findall(text.lower())) - _STOPWORDS
+
+def _extract_json(text: str) -> Optional[str]:
+    """
+    Return the first balanced JSON object/array embedded in text, or None.
+    Walks the characters once with a depth counter, skipping brackets that
+    appear inside quoted strings (including escaped quotes).
+    """
+    start = -1
+    for i, ch in enumerate(text):
+        if ch in "{[":
+            start = i
+            break
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+def _orjson_default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def _dumps(obj: Any) -> str:
+    """Serialize prompt context (dicts, pydantic models) to a JSON string"""
+    return orjson.dumps(obj, default=_orjson_default).decode()
+
+def _parse_llm_json(text: str) -> Any:
+    """Parse JSON from an LLM reply, tolerating code fences and surrounding prose"""
+    text = clean_llm_json(text)
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        extracted = _extract_json(text)
+        if extracted is None:
+            raise
+        return orjson.loads(extracted)
+
+_JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+class _JsonStringField:
+    """
+    Incrementally decodes one top-level string field (e.g. "message") out of
+    a JSON object that arrives in chunks, so its text can be shown while the
+    rest of the object is still being generated. Each character is scanned
+    once; feed() returns the newly decoded part of the field's value.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._depth = 0
+        self._in_string = False
+        self._escape: Optional[str] = None  # "" after a backslash, then "u" + hex digits
+        self._token: List[str] = []
+        self._key: Optional[str] = None  # last string closed at the top level
+        self._state = "scan"  # scan -> colon -> value -> done
+        self._high_surrogate: Optional[int] = None
+
+    def feed(self, chunk: str) -> str:
+        out: List[str] = []
+        for ch in chunk:
+            if self._state == "done":
+                break
+            if self._state == "value":
+                self._decode(ch, out)
+            elif self._in_string:
+                if self._escape is not None:
+                    self._escape = None
+                elif ch == "\\":
+                    self._escape = ""
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._key = "".join(self._token)
+                else:
+                    self._token.append(ch)
+            elif self._state == "colon":
+                if ch == '"':
+                    self._state = "value"
+                elif not ch.isspace():
+                    # Not a string value (e.g. null); nothing to stream
+                    self._state = "done"
+            elif ch == '"':
+                self._in_string = True
+                self._token = []
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+            elif ch == ":" and self._depth == 1:
+                if self._key == self.name:
+                    self._state = "colon"
+                self._key = None
+            elif ch == ",":
+                self._key = None
+        return "".join(out)
+
+    def _decode(self, ch: str, out: List[str]):
+        if self._escape is None:
+            if ch == "\\":
+                self._escape = ""
+            elif ch == '"':
+                self._state = "done"
+            else:
+                out.append(ch)
+        elif self._escape == "" and ch != "u":
+            out.append(_JSON_ESCAPES.get(ch, ch))
+            self._escape = None
+        else:
+            self._escape += ch
+            if len(self._escape) < 5:
+                return
+            code = int(self._escape[1:], 16)
+            self._escape = None
+            if 0xD800 <= code < 0xDC00:
+                # High half of a surrogate pair; wait for the low half
+                self._high_surrogate = code
+            elif 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+                out.append(chr(0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)))
+                self._high_surrogate = None
+            else:
+                out.append(chr(code))
+
+# Sentinel for a provider service that has not been created yet (None means
+# creation was attempted and failed)
+_NOT_CREATED = object()
+
+_MENU_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '../../data/menu_data.json'))
+
+def _read_menu(path: str) -> Tuple[Mapping[str, Any], ...]:
+    """
+    Read-only menu items for path, from the same parsed-file cache that
+    MenuService loads through. Items are sorted into a stable order, which
+    keeps the rendered menu (and so provider prefix caches) byte-identical
+    for a given menu.
+    """
+    items = load_json_cached(path)["items"]
+    return tuple(MappingProxyType(item) for item in sorted(items, key=_menu_sort_key))
 
 class LLMProvider(Enum):
     GEMINI = "gemini"
     OLLAMA = "ollama"
 
-@dataclass
+@dataclass(slots=True)
 class LLMResponse:
     content: str
     provider: LLMProvider
@@ -27,288 +311,818 @@ class LLMResponse:
     fallback_used: bool = False
     tokens_used: Optional[int] = None
 
+def log_attempts(provider: LLMProvider):
+    """
+    Log the outcome and latency of every call to a provider (including
+    timeouts, which otherwise surface only as a bare TimeoutError) and record
+    successful-call latencies for get_provider_stats
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = await func(self, *args, **kwargs)
+            except Exception as e:
+                status = getattr(e, "status_code", None) or getattr(e, "code", None)
+                logger.warning(
+                    "{} call failed after {:.0f}ms: {} (status={}): {}",
+                    provider.value, (time.perf_counter() - start) * 1000,
+                    type(e).__name__, status, e
+                )
+                raise
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._latencies[provider].append(elapsed_ms)
+            logger.debug("{} call succeeded in {:.0f}ms", provider.value, elapsed_ms)
+            return result
+        return wrapper
+    return decorator
+
+def rate_limited(provider: LLMProvider):
+    """
+    Wait for the provider's request-rate budget before calling it, so bursts
+    are smoothed out instead of turning into 429s and retries. Applied outside
+    log_attempts so queueing time is not counted as provider latency.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            async with self._limiters[provider]:
+                return await func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def _latency_summary(samples: deque) -> Dict[str, Any]:
+    """p50/p95 (nearest rank) of the recorded latencies, in milliseconds"""
+    if not samples:
+        return {"samples": 0, "p50": None, "p95": None}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        "samples": len(ordered),
+        "p50": round(ordered[int(0.50 * last)], 1),
+        "p95": round(ordered[int(0.95 * last)], 1)
+    }
+
 class LLMService:
     def __init__(self):
-        # Initialize Gemini and Ollama clients here
-        self.gemini_service = None
-        self.ollama_service = None
-        self._init_services()
+        # Gemini and Ollama clients are created on first use (see the
+        # gemini_service / ollama_service properties) so startup doesn't wait
+        # on client setup
+        self._gemini_service: Any = _NOT_CREATED
+        self._ollama_service: Any = _NOT_CREATED
         
-        # Fallback tracking
-        self.consecutive_errors = 0
-        self.current_provider = LLMProvider.GEMINI
+        # Fallback tracking: one circuit breaker per provider
+        self.gemini_breaker = self._make_breaker(LLMProvider.GEMINI)
+        self.ollama_breaker = self._make_breaker(LLMProvider.OLLAMA)
+        self.current_provider = LLMProvider.GEMINI  # provider of the last successful call
+        # Recent successful-call latencies (ms) per provider, for p50/p95 reporting
+        self._latencies: Dict[LLMProvider, deque] = {
+            provider: deque(maxlen=100) for provider in LLMProvider
+        }
+        # Proactive per-provider throttling to the configured requests/minute.
+        # Calls go through the circuit breaker first, so an OPEN circuit fails
+        # fast without touching the limiter.
+        self._limiters: Dict[LLMProvider, AsyncLimiter] = {
+            LLMProvider.GEMINI: AsyncLimiter(settings.gemini_requests_per_minute, 60),
+            LLMProvider.OLLAMA: AsyncLimiter(settings.ollama_requests_per_minute, 60)
+        }
         self.last_health_check = 0
         self.gemini_healthy = True
         self.ollama_healthy = True
+
+        # Exact-match response cache keyed on a digest of (prompt, context)
+        self._response_cache: TTLCache = TTLCache(
+            maxsize=settings.llm_cache_max_size,
+            ttl=settings.llm_cache_ttl_seconds
+        )
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # Provider calls in flight per cache key; identical concurrent requests
+        # join the running call instead of starting their own
+        self._inflight: Dict[bytes, asyncio.Task] = {}
+        self._inflight_joins = 0
+        # Rendered preference blocks keyed by the preferences' JSON; sessions
+        # resend the same preferences every turn
+        self._preferences_cache: LRUCache = LRUCache(maxsize=1024)
+        # Paraphrase-tolerant cache of Gemini answers to opening messages,
+        # served while Ollama is the active provider (see process_message)
+        self._semantic_cache = SemanticCache(
+            model_name=settings.semantic_cache_model,
+            threshold=settings.semantic_cache_threshold,
+            max_entries=settings.semantic_cache_max_entries,
+            enabled=settings.semantic_cache_enabled
+        )
         
-        # Ollama client for direct usage
-        self.ollama_client = ollama.Client(host=settings.OLLAMA_BASE_URL)
-        self.model = settings.MODEL_NAME
+        # Calls beyond the server's parallel slots wait here instead of queueing
+        # on the Ollama server
+        self._ollama_semaphore = asyncio.Semaphore(settings.ollama_max_concurrency)
+        # Fire-and-forget work (semantic cache fills); referenced until done
+        self._background_tasks: Set[asyncio.Task] = set()
+
+        # Same model OllamaService calls, so direct and service calls agree
+        self.model = settings.ollama_model
+
+        # Static prompt scaffolding, rendered once
+        self._welcome_parts = _split_template(
+            _WELCOME_PROMPT_TEMPLATE, ["preferences"], app_name=settings.APP_NAME
+        )
+        self._process_parts = _split_template(
+            _PROCESS_PROMPT_TEMPLATE,
+            ["menu", "preferences", "history", "message"],
+            app_name=settings.APP_NAME
+        )
 
-        # Load menu data once at startup
-        menu_path = os.path.join(os.path.dirname(__file__), '../../data/menu_data.json')
-        with open(menu_path, 'r', encoding='utf-8') as f:
-            self.menu_data = json.load(f)["items"]
+        # Load menu data once at startup, like MenuService does
+        self._load_menu()
 
-    def _init_services(self):
-        """Initialize Gemini and Ollama services"""
+    def _load_menu(self):
+        """Load the menu and precompute everything derived from it"""
+        self.menu_data = _read_menu(_MENU_PATH)
+
+        # Render the menu's prompt text once per load, not per request
+        self._menu_lines = [self._format_menu_line(item) for item in self.menu_data]
+        self._menu_keywords = [self._menu_item_keywords(item) for item in self.menu_data]
+        self._menu_by_name = {item['name'].lower(): item for item in self.menu_data}
+        self.menu_version = hashlib.blake2b(
+            "\n".join(self._menu_lines).encode(), digest_size=4
+        ).hexdigest()
+        self._menu_header = _MENU_HEADER.format(version=self.menu_version)
+        self._menu_text = self._build_menu_text()
+        self._process_prefix = "".join(
+            [self._process_parts[0], self._menu_text, self._process_parts[1]]
+        )
+
+    @staticmethod
+    def _make_breaker(provider: LLMProvider) -> CircuitBreaker:
+        return CircuitBreaker(
+            name=provider.value,
+            failure_threshold=settings.fallback_threshold_errors,
+            recovery_seconds=settings.circuit_recovery_seconds,
+            max_recovery_seconds=settings.circuit_max_recovery_seconds,
+            window_seconds=settings.circuit_window_seconds,
+            failure_rate=settings.circuit_failure_rate
+        )
+
+    @staticmethod
+    def _create_service(factory, name: str):
+        """Instantiate a provider service; None (and a warning) if that fails"""
         try:
-            from .gemini_service import GeminiService
-            self.gemini_service = GeminiService()
-            logger.info("Gemini service initialized")
+            service = factory()
+            logger.info(f"{name} service initialized")
+            return service
         except Exception as e:
-            logger.warning(f"Failed to initialize Gemini service: {e}")
-            
+            logger.warning(f"Failed to initialize {name} service: {e}")
+            return None
+
+    @property
+    def gemini_service(self) -> Optional[GeminiService]:
+        if self._gemini_service is _NOT_CREATED:
+            self._gemini_service = self._create_service(GeminiService, "Gemini")
+        return self._gemini_service
+
+    @gemini_service.setter
+    def gemini_service(self, service: Optional[GeminiService]):
+        self._gemini_service = service
+
+    @property
+    def ollama_service(self) -> Optional[OllamaService]:
+        if self._ollama_service is _NOT_CREATED:
+            self._ollama_service = self._create_service(OllamaService, "Ollama")
+        return self._ollama_service
+
+    @ollama_service.setter
+    def ollama_service(self, service: Optional[OllamaService]):
+        self._ollama_service = service
+
+    @rate_limited(LLMProvider.GEMINI)
+    @log_attempts(LLMProvider.GEMINI)
+    async def _call_gemini(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        timeout: Optional[float] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Call Gemini with a hard deadline; a timeout counts as a provider failure"""
+        return await asyncio.wait_for(
+            self.gemini_service.generate(prompt, context, response_schema=response_schema),
+            timeout=timeout or settings.gemini_timeout_seconds
+        )
+
+    @rate_limited(LLMProvider.OLLAMA)
+    @log_attempts(LLMProvider.OLLAMA)
+    async def _call_ollama(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        timeout: Optional[float] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Call Ollama with a hard deadline; a timeout counts as a provider failure"""
+        return await asyncio.wait_for(
+            self._generate_ollama(prompt, context, response_schema),
+            timeout=timeout or settings.ollama_timeout_seconds
+        )
+
+    async def _generate_ollama(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Call OllamaService with at most ollama_max_concurrency calls in flight"""
+        async with self._ollama_semaphore:
+            return await self.ollama_service.generate(prompt, context, response_schema=response_schema)
+
+    async def aclose(self):
+        """Stop any shared calls or background tasks still running"""
+        tasks = [*self._inflight.values(), *self._background_tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _spawn_background(self, coro: Awaitable[Any]):
+        """Run coro without awaiting it, keeping a reference until it finishes"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _semantic_store(
+        self,
+        bucket: int,
+        message: str,
+        response: Dict[str, Any],
+        embedding: Optional[Any] = None
+    ):
+        """Embed message (unless already embedded) and cache response for it"""
         try:
-            from .ollama_service import OllamaService
-            self.ollama_service = OllamaService()
-            logger.info("Ollama service initialized")
+            if embedding is None:
+                embedding = await self._semantic_cache.embed(message)
+            self._semantic_cache.store(bucket, embedding, response)
         except Exception as e:
-            logger.warning(f"Failed to initialize Ollama service: {e}")
+            logger.warning("Semantic cache store failed: {}", e)
+
+    @staticmethod
+    def _cache_key(
+        prompt: str,
+        context: Optional[str],
+        use_fallback: bool,
+        response_schema: Optional[Dict[str, Any]]
+    ) -> bytes:
+        """Compact digest of the inputs that determine a provider response"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{prompt}\x00{context or ''}\x00{int(use_fallback)}\x00".encode())
+        if response_schema is not None:
+            digest.update(orjson.dumps(response_schema, option=orjson.OPT_SORT_KEYS))
+        return digest.digest()
 
     async def generate_response(
         self, 
         prompt: str, 
         context: Optional[str] = None,
-        use_fallback: bool = True
+        use_fallback: bool = True,
+        use_cache: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        race: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Generate a response, serving repeated identical prompts from the
+        in-process cache instead of calling a provider again, and sharing
+        one provider call between identical prompts that overlap. With
+        response_schema, providers are constrained to emit matching JSON.
+        With race (and settings.race_providers_enabled), both providers are
+        called at once instead of hedging after hedge_after_ms.
+        """
+        if not use_cache:
+            return await self._generate_from_providers(
+                prompt, context, use_fallback, response_schema, race=race
+            )
+
+        cache_key = self._cache_key(prompt, context, use_fallback, response_schema)
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            self._cache_hits += 1
+            return {**cached, "response_time": 0.0, "cached": True}
+
+        task = self._inflight.get(cache_key)
+        if task is None:
+            self._cache_misses += 1
+            task = asyncio.create_task(self._generate_and_cache(
+                cache_key, prompt, context, use_fallback, response_schema, race
+            ))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda t: self._inflight_done(cache_key, t))
+        else:
+            self._inflight_joins += 1
+
+        # Shielded so one caller going away does not cancel the call for the others
+        result = await asyncio.shield(task)
+        return {**result}
+
+    async def _generate_and_cache(
+        self,
+        cache_key: bytes,
+        prompt: str,
+        context: Optional[str],
+        use_fallback: bool,
+        response_schema: Optional[Dict[str, Any]],
+        race: bool
+    ) -> Dict[str, Any]:
+        result = await self._generate_from_providers(
+            prompt, context, use_fallback, response_schema, race=race
+        )
+        self._response_cache[cache_key] = result
+        return result
+
+    def _inflight_done(self, cache_key: bytes, task: asyncio.Task):
+        self._inflight.pop(cache_key, None)
+        # Mark a failure as retrieved even if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _generate_from_providers(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        use_fallback: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        race: bool = False
     ) -> Dict[str, Any]:
         """
         Generate response using Gemini as primary, Ollama as fallback
         """
         start_time = time.time()
-        
-        # Check if we should use fallback due to consecutive errors
-        if (self.consecutive_errors >= settings.fallback_threshold_errors and 
-            settings.use_ollama_fallback):
-            self.current_provider = LLMProvider.OLLAMA
-            
-        # Try primary provider first (unless we're in fallback mode)
-        if self.current_provider == LLMProvider.GEMINI and self.gemini_service:
-            try:
-                logger.info("Attempting Gemini API call")
-                response = await self.gemini_service.generate(prompt, context)
-                self.consecutive_errors = 0  # Reset error counter on success
-                return {
-                    "response": response,
-                    "provider": "gemini",
-                    "success": True,
-                    "response_time": time.time() - start_time
-                }
-                
-            except Exception as gemini_error:
-                logger.warning(f"Gemini failed: {gemini_error}")
-                self.consecutive_errors += 1
-                
-                # Try fallback if enabled
-                if use_fallback and settings.use_ollama_fallback and self.ollama_service:
-                    try:
-                        logger.info("Falling back to Ollama")
-                        response = await self.ollama_service.generate(prompt, context)
-                        return {
-                            "response": response,
-                            "provider": "ollama",
-                            "success": True,
-                            "fallback_used": True,
-                            "response_time": time.time() - start_time
-                        }
-                    except Exception as ollama_error:
-                        logger.error(f"Both providers failed. Ollama: {ollama_error}")
-                        raise Exception("All LLM providers failed")
-                else:
-                    raise gemini_error
+
+        # Skip providers whose circuit is open instead of paying their timeout
+        gemini_ready = self.gemini_service is not None and self.gemini_breaker.allows_request()
+        ollama_ready = self.ollama_service is not None and self.ollama_breaker.allows_request()
+
+        if gemini_ready and ollama_ready and use_fallback and settings.use_ollama_fallback:
+            # Racing doubles token spend, so it must also be enabled in settings
+            hedge_after_ms = 0 if race and settings.race_providers_enabled else settings.hedge_after_ms
+            response, provider = await self._hedged_generate(
+                prompt, context, response_schema, hedge_after_ms=hedge_after_ms
+            )
+        elif gemini_ready:
+            logger.info("Attempting Gemini API call")
+            response = await self.gemini_breaker.call(
+                self._call_gemini, prompt, context, response_schema=response_schema
+            )
+            provider = LLMProvider.GEMINI
+        elif ollama_ready:
+            logger.info("Gemini unavailable, using Ollama")
+            response = await self.ollama_breaker.call(
+                self._call_ollama, prompt, context, response_schema=response_schema
+            )
+            provider = LLMProvider.OLLAMA
+        elif self.gemini_service or self.ollama_service:
+            raise CircuitOpenError("All LLM provider circuits are open")
         else:
-            # We're in fallback mode or Gemini not available, try Ollama first
-            if self.ollama_service:
-                try:
-                    response = await self.ollama_service.generate(prompt, context)
-                    return {
-                        "response": response,
-                        "provider": "ollama",
-                        "success": True,
-                        "response_time": time.time() - start_time
-                    }
-                except Exception as ollama_error:
-                    logger.warning(f"Ollama failed: {ollama_error}")
-                    # Try Gemini as backup if available
-                    if self.gemini_service:
-                        try:
-                            response = await self.gemini_service.generate(prompt, context)
-                            self.consecutive_errors = 0  # Reset if Gemini works
-                            self.current_provider = LLMProvider.GEMINI  # Switch back
-                            return {
-                                "response": response,
-                                "provider": "gemini",
-                                "success": True,
-                                "response_time": time.time() - start_time
-                            }
-                        except Exception as gemini_error:
-                            raise Exception(f"Both LLM providers failed. Ollama: {ollama_error}, Gemini: {gemini_error}")
-                    else:
-                        raise ollama_error
-            else:
-                raise Exception("No LLM providers available")
+            raise Exception("No LLM providers available")
+
+        self.current_provider = provider
+        return {
+            "response": response,
+            "provider": provider.value,
+            "success": True,
+            "fallback_used": provider == LLMProvider.OLLAMA,
+            "response_time": time.time() - start_time
+        }
+
+    async def _hedged_generate(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        hedge_after_ms: Optional[int] = None
+    ) -> Tuple[str, LLMProvider]:
+        """
+        Call Gemini, and if it has not answered within hedge_after_ms (or has
+        already failed), start Ollama concurrently. The first successful answer
+        wins and the other request is cancelled. hedge_after_ms=0 races both
+        providers from the start.
+        """
+        gemini_task = asyncio.create_task(
+            self.gemini_breaker.call(self._call_gemini, prompt, context, response_schema=response_schema)
+        )
+        tasks = {gemini_task: LLMProvider.GEMINI}
+        errors: Dict[LLMProvider, BaseException] = {}
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    async def _generate_ollama_response(self, prompt: str) -> str:
-        """Generate a response from Ollama with retry logic"""
         try:
-            response = ollama.generate(
-                model=self.model,
-                prompt=prompt,
-                stream=False
+            logger.info("Attempting Gemini API call")
+            if hedge_after_ms is None:
+                hedge_after_ms = settings.hedge_after_ms
+            if hedge_after_ms > 0:
+                await asyncio.wait({gemini_task}, timeout=hedge_after_ms / 1000)
+            if gemini_task.done():
+                if gemini_task.exception() is None:
+                    return gemini_task.result(), LLMProvider.GEMINI
+                errors[LLMProvider.GEMINI] = gemini_task.exception()
+                logger.warning(f"Gemini failed: {errors[LLMProvider.GEMINI]}")
+                logger.info("Falling back to Ollama")
+            elif hedge_after_ms > 0:
+                logger.info(f"Gemini slower than {hedge_after_ms}ms, hedging with Ollama")
+            else:
+                logger.info("Racing Gemini and Ollama")
+
+            ollama_task = asyncio.create_task(
+                self.ollama_breaker.call(self._call_ollama, prompt, context, response_schema=response_schema)
             )
-            return response['response']
-        except Exception as e:
-            logger.error(f"Error generating Ollama response: {str(e)}")
-            raise
+            tasks[ollama_task] = LLMProvider.OLLAMA
+            pending = {task for task in tasks if not task.done()}
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider = tasks[task]
+                    if task.exception() is None:
+                        return task.result(), provider
+                    errors[provider] = task.exception()
+                    logger.warning(f"{provider.value} failed: {errors[provider]}")
+        finally:
+            # Cancel whichever request lost (or everything, if we were cancelled)
+            # and wait for it to unwind, so its HTTP request is aborted and the
+            # connection returned to the pool before we move on
+            losers = [task for task in tasks if not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                await asyncio.gather(*losers, return_exceptions=True)
+
+        logger.error(f"Both providers failed. {errors}")
+        raise Exception("All LLM providers failed")
+
+    async def stream_response(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        use_fallback: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        Stream response chunks from the active provider. Falls back to the other
+        provider only if the first one fails before producing any output.
+        """
+        async for _, chunk in self._stream_from_providers(prompt, context, use_fallback):
+            yield chunk
+
+    async def _stream_from_providers(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        use_fallback: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Tuple[LLMProvider, str]]:
+        """stream_response, with each chunk tagged by the provider that produced it"""
+        providers = [
+            (LLMProvider.GEMINI, self.gemini_service, self.gemini_breaker),
+            (LLMProvider.OLLAMA, self.ollama_service, self.ollama_breaker)
+        ]
+        if not (use_fallback and settings.use_ollama_fallback):
+            providers = providers[:1]
+
+        last_error: Optional[Exception] = None
+        for provider, service, breaker in providers:
+            if service is None:
+                continue
+            try:
+                probing = breaker.acquire()
+            except CircuitOpenError:
+                continue
+            # The first chunk settles the breaker outcome, as a whole call does in
+            # CircuitBreaker.call, and has the provider's per-call deadline; a stall
+            # before it counts as a failure and falls back. After that, each chunk
+            # must arrive within the idle timeout.
+            stream = service.stream(prompt, context, response_schema=response_schema)
+            timeout = (
+                settings.gemini_timeout_seconds if provider == LLMProvider.GEMINI
+                else settings.ollama_timeout_seconds
+            )
+            started = False
+            try:
+                await self._limiters[provider].acquire()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(anext(stream), timeout)
+                    except StopAsyncIteration:
+                        break
+                    if not started:
+                        started = True
+                        breaker.release(probing)
+                        timeout = settings.stream_idle_timeout_seconds
+                    yield provider, chunk
+                if not started:
+                    started = True
+                    breaker.release(probing)
+                return
+            except BaseException as e:
+                if started:
+                    raise
+                breaker.release(probing, e)
+                if not isinstance(e, Exception):
+                    raise
+                logger.warning(f"{provider.value} streaming failed: {type(e).__name__}: {e}")
+                last_error = e
+            finally:
+                await stream.aclose()
+
+        raise last_error or Exception("No LLM providers available")
 
     def _format_chat_history(self, messages: List[ChatMessage]) -> str:
         """Format chat history for the LLM prompt"""
-        formatted_history = ""
-        for msg in messages:
-            role = "User" if msg.role == "user" else "Assistant"
-            formatted_history += f"{role}: {msg.content}\n"
-        return formatted_history
+        buf = io.StringIO()
+        self._write_chat_history(buf, messages)
+        return buf.getvalue()
+
+    def _write_chat_history(self, buf: io.StringIO, messages: List[ChatMessage]):
+        # Only the most recent turns (user + assistant message each) are sent
+        for msg in messages[-2 * settings.max_history_turns:]:
+            buf.write("User: " if msg.role == "user" else "Assistant: ")
+            buf.write(msg.content)
+            buf.write("\n")
 
     def _format_preferences(self, preferences: Optional[UserPreferences]) -> str:
-        """Format user preferences for the LLM prompt"""
+        """Format user preferences for the LLM prompt, memoized on their content"""
         if not preferences:
             return "No specific preferences provided."
-        
-        pref_str = "User Preferences:\n"
+
+        key = preferences.model_dump_json()
+        text = self._preferences_cache.get(key)
+        if text is None:
+            buf = io.StringIO()
+            self._write_preferences(buf, preferences)
+            text = self._preferences_cache[key] = buf.getvalue()
+        return text
+
+    def _write_preferences(self, buf: io.StringIO, preferences: Optional[UserPreferences]):
+        if not preferences:
+            buf.write("No specific preferences provided.")
+            return
+
+        buf.write("User Preferences:\n")
         if preferences.dietary_restrictions:
-            pref_str += f"- Dietary Restrictions: {', '.join(preferences.dietary_restrictions)}\n"
+            buf.write(f"- Dietary Restrictions: {', '.join(preferences.dietary_restrictions)}\n")
         if preferences.allergies:
-            pref_str += f"- Allergies: {', '.join(preferences.allergies)}\n"
+            buf.write(f"- Allergies: {', '.join(preferences.allergies)}\n")
         if preferences.price_range:
-            pref_str += f"- Price Range: ${preferences.price_range[0]} - ${preferences.price_range[1]}\n"
+            buf.write(f"- Price Range: ${preferences.price_range[0]} - ${preferences.price_range[1]}\n")
         if preferences.favorite_cuisines:
-            pref_str += f"- Favorite Cuisines: {', '.join(preferences.favorite_cuisines)}\n"
+            buf.write(f"- Favorite Cuisines: {', '.join(preferences.favorite_cuisines)}\n")
         if preferences.spice_preference:
-            pref_str += f"- Spice Preference: Level {preferences.spice_preference}/5\n"
-        return pref_str
+            buf.write(f"- Spice Preference: Level {preferences.spice_preference}/5\n")
 
     def _format_menu_for_prompt(self) -> str:
+        """Return the menu formatted for the LLM prompt (cached)"""
+        if self._menu_text is None:
+            self._menu_text = self._build_menu_text()
+        return self._menu_text
+
+    def _build_menu_text(self) -> str:
         """Format menu items for LLM prompt"""
-        menu_lines = []
-        for item in self.menu_data:
-            try:
-                dietary = ", ".join(item.get('dietary_tags', []) or [])
-                allergens = ", ".join(item.get('allergens', []) or [])
-                menu_lines.append(
-                    f"- {item.get('name', '')}: {item.get('description', '')} "
-                    f"(Cuisine: {item.get('cuisine_type', '')}, Price: ${item.get('price', '')}, "
-                    f"Dietary: {dietary}, Allergens: {allergens})"
-                )
-            except Exception:
-                continue
-        return "\n".join(menu_lines)
+        return "\n".join([self._menu_header, *self._menu_lines])
 
-    async def generate_welcome_message(
+    @staticmethod
+    def _format_menu_line(item: Mapping[str, Any]) -> str:
+        """Compact one-line form of a menu item (far fewer tokens than prose)"""
+        return _MENU_LINE_TEMPLATE.format_map({
+            **_MENU_LINE_DEFAULTS,
+            **item,
+            "dietary": ",".join(item.get('dietary_tags') or ()),
+            "allergens": ",".join(item.get('allergens') or ())
+        })
+
+    @staticmethod
+    def _menu_item_keywords(item: Mapping[str, Any]) -> frozenset:
+        """Lowercased words a user message might use to refer to this item"""
+        fields = [
+            item.get('name', ''),
+            item.get('cuisine_type', ''),
+            item.get('category', ''),
+            *(item.get('dietary_tags') or []),
+            *(item.get('ingredients') or [])
+        ]
+        return _keywords(" ".join(str(f) for f in fields).replace("_", " "))
+
+    def _select_relevant_menu(
         self,
+        message: str,
         preferences: Optional[UserPreferences] = None
     ) -> str:
-        """Generate a welcome message for new conversations"""
-        prompt = f"""You are a friendly and knowledgeable restaurant AI assistant for {settings.APP_NAME}. 
-Your goal is to help customers find the perfect meal based on their preferences and needs.
+        """
+        Menu text restricted to the items most relevant to the message and
+        preferences (keyword overlap). Falls back to the full menu when it is
+        already small or nothing matches.
+        """
+        limit = settings.menu_prompt_max_items
+        if len(self._menu_lines) <= limit:
+            return self._format_menu_for_prompt()
 
-{self._format_preferences(preferences)}
+        query = message
+        if preferences:
+            query = " ".join([
+                message,
+                *preferences.favorite_cuisines,
+                *(r.value for r in preferences.dietary_restrictions)
+            ])
+        wanted = _keywords(query.replace("_", " "))
+        scores = [len(wanted & keywords) for keywords in self._menu_keywords]
+        if not any(scores):
+            return self._format_menu_for_prompt()
 
-Generate a warm welcome message that:
-1. Introduces yourself as the restaurant's AI assistant
-2. Acknowledges any provided preferences
-3. Invites the customer to start their dining experience
-4. Keeps the message concise and friendly
+        # Keep the top-scoring items, but in menu order so the text stays stable
+        top = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)[:limit]
+        return "\n".join([self._menu_header, *(self._menu_lines[i] for i in sorted(top))])
 
-Response:"""
+    async def generate_welcome_message(
+        self,
+        preferences: Optional[UserPreferences] = None
+    ) -> str:
+        """Generate a welcome message for new conversations"""
+        prompt = self._build_welcome_prompt(preferences)
 
         try:
-            result = await self.generate_response(prompt)
+            # First impression: latency matters more than token spend here
+            result = await self.generate_response(prompt, race=True)
             return result["response"]
         except Exception as e:
             logger.error(f"Error generating welcome message: {e}")
-            return f"Welcome to {settings.APP_NAME}! I'm your AI assistant, ready to help you find the perfect meal. How can I assist you today?"
+            return self._default_welcome_message()
 
-    async def process_message(
+    async def stream_welcome_message(
         self,
-        message: str,
-        context: List[ChatMessage],
         preferences: Optional[UserPreferences] = None
-    ) -> Dict[str, Any]:
-        """Process a user message and generate a response"""
-        menu_text = self._format_menu_for_prompt()
-        prompt = f"""You are a friendly and knowledgeable restaurant AI assistant for {settings.APP_NAME}.
-Your goal is to help customers find the perfect meal based on their preferences and needs.
-
-ONLY recommend meals from the menu below. Use the menu properties (ingredients, allergens, dietary tags, nutrition, etc.) to answer questions and explain suitability for health conditions (e.g., ulcers, allergies). Do NOT invent new dishes.
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of generate_welcome_message. The welcome is plain
+        text (no JSON to parse), so chunks can go straight to the client.
+        """
+        prompt = self._build_welcome_prompt(preferences)
+        started = False
+        try:
+            async for chunk in self.stream_response(prompt):
+                started = True
+                yield chunk
+        except Exception as e:
+            logger.error(f"Error streaming welcome message: {e}")
+            if not started:
+                yield self._default_welcome_message()
 
-Menu:
-{menu_text}
+    def _build_welcome_prompt(self, preferences: Optional[UserPreferences]) -> str:
+        head, tail = self._welcome_parts
+        return "".join([head, self._format_preferences(preferences), tail])
 
-{self._format_preferences(preferences)}
+    @staticmethod
+    def _default_welcome_message() -> str:
+        return f"Welcome to {settings.APP_NAME}! I'm your AI assistant, ready to help you find the perfect meal. How can I assist you today?"
 
-Previous conversation:
-{self._format_chat_history(context)}
+    def _build_process_prompt(
+        self,
+        message: str,
+        context: List[ChatMessage],
+        preferences: Optional[UserPreferences] = None
+    ) -> str:
+        head, after_menu, after_preferences, after_history, tail = self._process_parts
+        menu = self._select_relevant_menu(message, preferences)
 
-User's latest message: {message}
+        # Written in one pass, without intermediate preference/history strings
+        buf = io.StringIO()
+        # The full-menu prefix is prebuilt; only a pruned menu needs a fresh one
+        if menu is self._menu_text:
+            buf.write(self._process_prefix)
+        else:
+            buf.write(head)
+            buf.write(menu)
+            buf.write(after_menu)
+        buf.write(self._format_preferences(preferences))
+        buf.write(after_preferences)
+        self._write_chat_history(buf, context)
+        buf.write(after_history)
+        buf.write(message)
+        buf.write(tail)
+        return buf.getvalue()
 
-Generate a response that:
-1. Addresses the user's message directly
-2. Maintains a friendly and helpful tone
-3. Provides relevant information about menu items if appropriate
-4. Asks follow-up questions to better understand their needs
+    def _parse_process_response(self, response_text: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn the model's JSON reply into the process_message result"""
+        try:
+            # Providers run in JSON mode here, so the reply is parsed as-is
+            parsed_response = orjson.loads(response_text)
+        except orjson.JSONDecodeError:
+            parsed_response = None
+        # JSON mode guarantees valid JSON, not an object
+        if not isinstance(parsed_response, dict):
+            logger.error(f"Failed to parse LLM response as a JSON object: {response_text}")
+            return {
+                "message": "I apologize, but I'm having trouble processing your request. Could you please rephrase it?",
+                "should_recommend_meals": False,
+                "context": {"intent": "error", "key_preferences": []},
+                "metadata": {**metadata, "error": "json_parse_error"}
+            }
 
-Format your response as a JSON object with the following structure:
-{{
-    "message": "Your response message",
-    "should_recommend_meals": true/false,
-    "context": {{
-        "intent": "user's intent (e.g., 'meal_recommendation', 'menu_inquiry', 'general_question')",
-        "key_preferences": ["list", "of", "key", "preferences", "mentioned"]
-    }},
-    "metadata": {{
-        "provider_used": "gemini or ollama",
-        "response_time": "response time in seconds"
-    }}
-}}
+        # Add provider metadata
+        parsed_response["metadata"] = parsed_response.get("metadata", {})
+        parsed_response["metadata"].update(metadata)
+        return parsed_response
 
-Response:"""
+    @staticmethod
+    def _process_error_response(error: Exception) -> Dict[str, Any]:
+        return {
+            "message": "I'm sorry, I'm experiencing technical difficulties. Please try again in a moment.",
+            "should_recommend_meals": False,
+            "context": {"intent": "error", "key_preferences": []},
+            "metadata": {"error": str(error)}
+        }
 
-        try:
-            result = await self.generate_response(prompt)
-            response_text = result["response"]
-            # Clean the LLM response before parsing
-            response_text = clean_llm_json(response_text)
+    async def process_message(
+        self,
+        message: str,
+        context: List[ChatMessage],
+        preferences: Optional[UserPreferences] = None
+    ) -> Dict[str, Any]:
+        """Process a user message and generate a response"""
+        # Only an opening message (history is just this message) depends on
+        # nothing but the message and preferences, so only those are safe to
+        # answer from a paraphrase. Gemini answers are cached in the background,
+        # off the response path; the cache is only consulted while Ollama is
+        # the active provider, where a Gemini answer beats a local round trip.
+        semantic = self._semantic_cache.enabled and len(context) <= 1
+        embedding = None
+        if semantic:
+            # Keyed on the menu version too, so answers about a replaced menu are not reused
+            bucket = SemanticCache.bucket(
+                f"{self.menu_version}\x00{preferences.model_dump_json() if preferences else ''}"
+            )
+        if semantic and self.current_provider == LLMProvider.OLLAMA:
             try:
-                parsed_response = json.loads(response_text)
-                # Add provider metadata
-                parsed_response["metadata"] = parsed_response.get("metadata", {})
-                parsed_response["metadata"]["provider_used"] = result["provider"]
-                parsed_response["metadata"]["response_time"] = result.get("response_time", 0)
-                parsed_response["metadata"]["fallback_used"] = result.get("fallback_used", False)
-                
-                return parsed_response
-            except json.JSONDecodeError:
-                logger.error(f"Failed to parse LLM response as JSON: {response_text}")
+                embedding = await self._semantic_cache.embed(message)
+                cached = self._semantic_cache.lookup(bucket, embedding)
+            except Exception as e:
+                # The cache is an optimization; fall through to the provider
+                logger.warning("Semantic cache lookup failed: {}", e)
+                cached = None
+            if cached is not None:
                 return {
-                    "message": "I apologize, but I'm having trouble processing your request. Could you please rephrase it?",
-                    "should_recommend_meals": False,
-                    "context": {"intent": "error", "key_preferences": []},
-                    "metadata": {
-                        "provider_used": result["provider"],
-                        "response_time": result.get("response_time", 0),
-                        "fallback_used": result.get("fallback_used", False),
-                        "error": "json_parse_error"
-                    }
+                    **cached,
+                    "metadata": {**cached["metadata"], "response_time": 0.0, "cache_hit": "semantic"}
                 }
+
+        prompt = self._build_process_prompt(message, context, preferences)
+
+        try:
+            result = await self.generate_response(prompt, response_schema=_PROCESS_RESPONSE_SCHEMA)
+            response = self._parse_process_response(result["response"], {
+                "provider_used": result["provider"],
+                "response_time": result.get("response_time", 0),
+                "fallback_used": result.get("fallback_used", False)
+            })
+            if (
+                semantic
+                and result["provider"] == LLMProvider.GEMINI.value
+                and "error" not in response["metadata"]
+            ):
+                # A private copy: the caller may modify response before the store runs
+                self._spawn_background(
+                    self._semantic_store(bucket, message, copy.deepcopy(response), embedding)
+                )
+            return response
         except Exception as e:
             logger.error(f"Error processing message: {e}")
-            return {
-                "message": "I'm sorry, I'm experiencing technical difficulties. Please try again in a moment.",
-                "should_recommend_meals": False,
-                "context": {"intent": "error", "key_preferences": []},
-                "metadata": {"error": str(e)}
-            }
+            return self._process_error_response(e)
+
+    async def stream_process_message(
+        self,
+        message: str,
+        context: List[ChatMessage],
+        preferences: Optional[UserPreferences] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of process_message: yields ("chunk", text) with the
+        reply's "message" text as the model generates it, then ("result", dict)
+        parsed from the full reply
+        """
+        prompt = self._build_process_prompt(message, context, preferences)
+        start_time = time.time()
+        buffer = bytearray()
+        reply_text = _JsonStringField("message")
+        provider = None
+
+        try:
+            async for provider, chunk in self._stream_from_providers(
+                prompt, response_schema=_PROCESS_RESPONSE_SCHEMA
+            ):
+                buffer += chunk.encode()
+                text = reply_text.feed(chunk)
+                if text:
+                    yield "chunk", text
+        except Exception as e:
+            logger.error(f"Error streaming message: {e}")
+            yield "result", self._process_error_response(e)
+            return
+
+        yield "result", self._parse_process_response(buffer.decode(), {
+            "provider_used": provider.value if provider else None,
+            "response_time": time.time() - start_time,
+            "fallback_used": provider == LLMProvider.OLLAMA
+        })
 
     async def generate_follow_up_questions(
         self,
@@ -317,37 +1131,29 @@ Response:"""
         context: Optional[Dict[str, Any]] = None
     ) -> List[str]:
         """Generate relevant follow-up questions based on the conversation context"""
-        prompt = f"""You are a restaurant AI assistant generating follow-up questions.
-
-User's message: {message}
-
-Context: {json.dumps(context) if context else 'No context provided'}
-
-Suggested meals: {json.dumps(suggested_meals) if suggested_meals else 'No meals suggested'}
-
-Generate 2-3 relevant follow-up questions that will help:
-1. Better understand the user's preferences
-2. Narrow down meal recommendations
-3. Address any unclear aspects of their request
-
-Format your response as a JSON array of strings.
-
-Response:"""
+        prompt = _FOLLOW_UP_PROMPT_TEMPLATE.format(
+            message=message,
+            context=_dumps(context) if context else 'No context provided',
+            suggested_meals=_dumps(suggested_meals) if suggested_meals else 'No meals suggested'
+        )
 
         try:
             result = await self.generate_response(prompt)
             response_text = result["response"]
-            # Clean the LLM response before parsing
-            response_text = clean_llm_json(response_text)
             try:
-                return json.loads(response_text)
-            except json.JSONDecodeError:
-                logger.error(f"Failed to parse follow-up questions as JSON: {response_text}")
-                return [
-                    "What type of cuisine are you interested in?",
-                    "Do you have any dietary restrictions?",
-                    "What's your preferred price range?"
-                ]
+                questions = _parse_llm_json(response_text)
+            except orjson.JSONDecodeError:
+                questions = None
+            # _parse_llm_json takes the first JSON value in the reply, which may
+            # be an object or a list of objects rather than the requested list
+            if isinstance(questions, list) and all(isinstance(q, str) for q in questions):
+                return questions
+            logger.error(f"Failed to parse follow-up questions as a JSON list of strings: {response_text}")
+            return [
+                "What type of cuisine are you interested in?",
+                "Do you have any dietary restrictions?",
+                "What's your preferred price range?"
+            ]
         except Exception as e:
             logger.error(f"Error generating follow-up questions: {e}")
             return [
@@ -366,23 +1172,28 @@ Response:"""
         
         self.last_health_check = current_time
         
-        # Test Gemini
+        # Probe both providers concurrently: total time is max(), not sum()
+        probes = []
         if self.gemini_service:
-            try:
-                await self.gemini_service.generate("Health check", None)
-                self.gemini_healthy = True
-            except Exception:
-                self.gemini_healthy = False
-                logger.warning("Gemini health check failed")
-        
-        # Test Ollama
+            probes.append(("gemini", self._call_gemini))
         if self.ollama_service:
-            try:
-                await self.ollama_service.generate("Health check", None)
-                self.ollama_healthy = True
-            except Exception:
-                self.ollama_healthy = False
-                logger.warning("Ollama health check failed")
+            probes.append(("ollama", self._call_ollama))
+
+        results = await asyncio.gather(
+            *(call("Health check", None, timeout=settings.health_check_timeout_seconds)
+              for _, call in probes),
+            return_exceptions=True
+        )
+        for (name, _), result in zip(probes, results):
+            healthy = not isinstance(result, BaseException)
+            setattr(self, f"{name}_healthy", healthy)
+            if isinstance(result, asyncio.TimeoutError):
+                logger.warning(
+                    f"{name.capitalize()} health check timed out after "
+                    f"{settings.health_check_timeout_seconds}s"
+                )
+            elif not healthy:
+                logger.warning(f"{name.capitalize()} health check failed: {type(result).__name__}: {result}")
         
         return {"gemini": self.gemini_healthy, "ollama": self.ollama_healthy}
 
@@ -391,13 +1202,14 @@ Response:"""
         return self.current_provider
         
     def reset_error_count(self):
-        """Reset consecutive error count"""
-        self.consecutive_errors = 0
+        """Close both provider circuits"""
+        self.gemini_breaker.reset()
+        self.ollama_breaker.reset()
         self.current_provider = LLMProvider.GEMINI
 
     def get_meal_details(self, meal_name: str, user_query: str) -> str:
         # Find the meal in loaded menu data
-        meal = next((item for item in self.menu_data if item['name'].lower() == meal_name.lower()), None)
+        meal = self._menu_by_name.get(meal_name.lower())
         if not meal:
             return "Sorry, I couldn't find details for that meal."
 
@@ -408,9 +1220,8 @@ Response:"""
         fat = nutri.get('fat')
 
         # Try to extract calorie goal from user query
-        import re
         calorie_goal = None
-        match = re.search(r'under (\d+)\s*calories', user_query.lower())
+        match = _CALORIE_GOAL_RE.search(user_query)
         if match:
             calorie_goal = int(match.group(1))
 
@@ -437,9 +1248,27 @@ Response:"""
 
     def get_provider_stats(self) -> Dict[str, Any]:
         """Get statistics about provider usage"""
+        lookups = self._cache_hits + self._cache_misses
         return {
             "current_provider": self.current_provider.value,
-            "consecutive_errors": self.consecutive_errors,
+            "menu_version": self.menu_version,
+            "circuits": {
+                "gemini": self.gemini_breaker.get_stats(),
+                "ollama": self.ollama_breaker.get_stats()
+            },
+            "response_cache": {
+                "size": len(self._response_cache),
+                "max_size": self._response_cache.maxsize,
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "hit_rate": round(self._cache_hits / lookups, 3) if lookups else None,
+                "inflight_joins": self._inflight_joins
+            },
+            "semantic_cache": self._semantic_cache.get_stats(),
+            "latency_ms": {
+                provider.value: _latency_summary(self._latencies[provider])
+                for provider in LLMProvider
+            },
             "gemini_healthy": self.gemini_healthy,
             "ollama_healthy": self.ollama_healthy,
             "last_health_check": self.last_health_check
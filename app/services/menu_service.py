@@ -1,57 +1,196 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, FrozenSet, Optional, Set, Tuple
+from dataclasses import dataclass
+import asyncio
 import json
+import numpy as np
 from loguru import logger
 from datetime import datetime
 import uuid
 
 from app.config import settings
 from app.models.schemas import MenuItem, MealCategory
+from app.utils.helpers import load_json_cached
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _enum_text(value: Any) -> str:
+    return (value.value if hasattr(value, 'value') else str(value)).lower()
+
+@dataclass(slots=True, frozen=True)
+class _SearchFields:
+    """Lowercased copies of the MenuItem fields that searches match against"""
+    name: str
+    description: str
+    ingredients: Tuple[str, ...]
+    category: str
+    cuisine_type: str
+    dietary_tags: FrozenSet[str]
+
+    @classmethod
+    def of(cls, item: MenuItem) -> "_SearchFields":
+        return cls(
+            name=item.name.lower(),
+            description=item.description.lower(),
+            ingredients=tuple(ing.lower() for ing in item.ingredients),
+            category=_enum_text(item.category),
+            cuisine_type=_enum_text(item.cuisine_type),
+            dietary_tags=frozenset(tag.lower() for tag in item.dietary_tags)
+        )
+
+    def trigrams(self) -> Set[str]:
+        grams = _trigrams(self.name) | _trigrams(self.description)
+        for ing in self.ingredients:
+            grams |= _trigrams(ing)
+        return grams
+
+    def matches_text(self, query: str) -> bool:
+        return (query in self.name or
+                query in self.description or
+                any(query in ing for ing in self.ingredients))
 
 class MenuService:
-    def __init__(self):
+    def __init__(
+        self,
+        menu_data: Optional[Dict[str, Any]] = None,
+        allergens_data: Optional[Dict[str, Any]] = None,
+        ingredients_data: Optional[Dict[str, Any]] = None
+    ):
         # Use correct settings attribute names
         self.menu_data_path = settings.MENU_DATA_PATH
         self.allergens_data_path = settings.ALLERGENS_DATA_PATH
         self.ingredients_data_path = settings.INGREDIENTS_DATA_PATH
 
-        # Load data and assign to instance variables
-        self.menu_data = self._load_menu_data()
-        self.allergens_data = self._load_allergens_data()
-        self.ingredients_data = self._load_ingredients_data()
+        # Load data (unless already loaded, see create) and assign to instance variables
+        if menu_data is None:
+            menu_data = self._load_menu_data()
+        self.allergens_data = allergens_data if allergens_data is not None else self._load_allergens_data()
+        self.ingredients_data = ingredients_data if ingredients_data is not None else self._load_ingredients_data()
 
-        # Create menu_items list from loaded menu_data
-        self.menu_items = [MenuItem(**item) for item in self.menu_data.get("items", [])]
-
-        # Call the correct data loading methods, or implement _load_data if needed
-        self._load_menu_data()
-        self._load_allergens_data()
-        self._load_ingredients_data()
+        # Validate each item into a MenuItem once; lookups reuse these instances
+        raw_items = menu_data.get("items", [])
+        self.menu_items = [MenuItem(**item) for item in raw_items]
+        self._index_items()
+        # MenuItem has no "special" field, so keep the active special windows
+        self._specials = self._parse_specials(raw_items)
 
         # Image upload/storage provider removed
 
-    def _load_menu_data(self) -> Dict[str, Any]:
+    @classmethod
+    async def create(cls) -> "MenuService":
+        """Build a MenuService, reading its three data files concurrently off the event loop"""
+        menu_data, allergens_data, ingredients_data = await asyncio.gather(
+            asyncio.to_thread(cls._load_menu_data),
+            asyncio.to_thread(cls._load_allergens_data),
+            asyncio.to_thread(cls._load_ingredients_data)
+        )
+        return cls(menu_data, allergens_data, ingredients_data)
+
+    def _parse_specials(self, raw_items: List[Dict[str, Any]]) -> List[Tuple[MenuItem, datetime, datetime]]:
+        """(item, start, end) for each active special, with its times parsed once"""
+        specials = []
+        for menu_item, item in zip(self.menu_items, raw_items):
+            special = item.get("special")
+            if not special or not special.get("is_active", False):
+                continue
+            try:
+                start = datetime.fromisoformat(special.get("start_time", "2000-01-01"))
+                end = datetime.fromisoformat(special.get("end_time", "2100-01-01"))
+            except ValueError as e:
+                logger.warning(f"Ignoring special for {menu_item.name}: {e}")
+                continue
+            specials.append((menu_item, start, end))
+        return specials
+
+    def _index_items(self):
+        """Build the lookup structures derived from self.menu_items"""
+        self._items_by_id: Dict[str, MenuItem] = {item.id: item for item in self.menu_items}
+        # Searches compare against these instead of lowercasing every field per query
+        self._search_fields: List[Tuple[MenuItem, _SearchFields]] = [
+            (item, _SearchFields.of(item)) for item in self.menu_items
+        ]
+        # Trigram -> positions in _search_fields whose text contains it
+        self._trigram_index: Dict[str, Set[int]] = {}
+        for position, (_, fields) in enumerate(self._search_fields):
+            for gram in fields.trigrams():
+                self._trigram_index.setdefault(gram, set()).add(position)
+
+        # Filter options over available items, gathered in one pass
+        categories, cuisines, tags = set(), set(), set()
+        for item in self.menu_items:
+            if item.available:
+                categories.add(item.category)
+                cuisines.add(item.cuisine_type)
+                tags.update(item.dietary_tags)
+        self._categories = sorted(categories)
+        self._cuisine_types = sorted(cuisines)
+        self._dietary_tags = sorted(tags)
+
+        # Columnar copies of the numeric/enum fields, so search_items filters
+        # with whole-array masks instead of per-item comparisons
+        n = len(self.menu_items)
+        self._available_col = np.fromiter((item.available for item in self.menu_items), dtype=bool, count=n)
+        self._price_col = np.fromiter((item.price for item in self.menu_items), dtype=np.float64, count=n)
+        self._spice_col = np.fromiter((item.spice_level for item in self.menu_items), dtype=np.int64, count=n)
+        self._popularity_col = np.fromiter(
+            (item.popularity_score for item in self.menu_items), dtype=np.float64, count=n
+        )
+        self._category_codes: Dict[str, int] = {}
+        self._cuisine_codes: Dict[str, int] = {}
+        self._category_col = np.fromiter(
+            (self._category_codes.setdefault(f.category, len(self._category_codes)) for _, f in self._search_fields),
+            dtype=np.int64, count=n
+        )
+        self._cuisine_col = np.fromiter(
+            (self._cuisine_codes.setdefault(f.cuisine_type, len(self._cuisine_codes)) for _, f in self._search_fields),
+            dtype=np.int64, count=n
+        )
+
+    def _text_positions(self, query: Optional[str]) -> Optional[List[int]]:
+        """
+        Positions of the entries that can contain the lowercased query: those
+        holding all of its trigrams, in menu order. Matches still need
+        matches_text to confirm. None (every entry) for queries under three
+        characters, which have no trigrams.
+        """
+        if not query or len(query) < 3:
+            return None
+        postings = sorted(
+            (self._trigram_index.get(gram, set()) for gram in _trigrams(query)),
+            key=len
+        )
+        return sorted(postings[0].intersection(*postings[1:]))
+
+    def _text_candidates(self, query: Optional[str]) -> List[Tuple[MenuItem, _SearchFields]]:
+        """Entries that can contain the lowercased query (see _text_positions)"""
+        positions = self._text_positions(query)
+        if positions is None:
+            return self._search_fields
+        return [self._search_fields[i] for i in positions]
+
+    @staticmethod
+    def _load_menu_data() -> Dict[str, Any]:
         """Load menu data from JSON file"""
         try:
-            with open(settings.MENU_DATA_PATH, 'r') as f:
-                return json.load(f)
+            return load_json_cached(settings.MENU_DATA_PATH)
         except Exception as e:
             logger.error(f"Error loading menu data: {str(e)}")
             return {"items": []}
 
-    def _load_allergens_data(self) -> Dict[str, Any]:
+    @staticmethod
+    def _load_allergens_data() -> Dict[str, Any]:
         """Load allergens data from JSON file"""
         try:
-            with open(settings.ALLERGENS_DATA_PATH, 'r') as f:
-                return json.load(f)
+            return load_json_cached(settings.ALLERGENS_DATA_PATH)
         except Exception as e:
             logger.error(f"Error loading allergens data: {str(e)}")
             return {"allergens": []}
 
-    def _load_ingredients_data(self) -> Dict[str, Any]:
+    @staticmethod
+    def _load_ingredients_data() -> Dict[str, Any]:
         """Load ingredients data from JSON file"""
         try:
-            with open(settings.INGREDIENTS_DATA_PATH, 'r') as f:
-                return json.load(f)
+            return load_json_cached(settings.INGREDIENTS_DATA_PATH)
         except Exception as e:
             logger.error(f"Error loading ingredients data: {str(e)}")
             return {"ingredients": []}
@@ -107,26 +246,21 @@ class MenuService:
         ]
         
         self.menu_items = [MenuItem(**item) for item in sample_items]
+        self._index_items()
+        self._specials = self._parse_specials(sample_items)
         logger.info(f"Created {len(self.menu_items)} sample menu items")
 
     def get_all_menu_items(self) -> List[MenuItem]:
         """Get all menu items"""
-        return [MenuItem(**item) for item in self.menu_data.get("items", [])]
+        return list(self.menu_items)
 
     def get_menu_items_by_category(self, category: MealCategory) -> List[MenuItem]:
         """Get menu items by category"""
-        return [
-            MenuItem(**item)
-            for item in self.menu_data.get("items", [])
-            if item["category"] == category
-        ]
+        return [item for item in self.menu_items if item.category == category]
 
     def get_menu_item_by_id(self, item_id: str) -> Optional[MenuItem]:
         """Get a specific menu item by ID"""
-        for item in self.menu_data.get("items", []):
-            if item["id"] == item_id:
-                return MenuItem(**item)
-        return None
+        return self._items_by_id.get(item_id)
 
     def search_menu_items(
         self,
@@ -139,22 +273,20 @@ class MenuService:
         results = []
         query = query.lower()
 
-        for item in self.menu_data.get("items", []):
+        for item, fields in self._text_candidates(query):
             # Skip if category doesn't match
-            if category and item["category"] != category:
+            if category and item.category != category:
                 continue
 
             # Skip if price is outside range
-            if max_price and item["price"] > max_price:
+            if max_price and item.price > max_price:
                 continue
-            if min_price and item["price"] < min_price:
+            if min_price and item.price < min_price:
                 continue
 
             # Check if query matches name or description
-            if (query in item["name"].lower() or
-                query in item["description"].lower() or
-                any(query in ing.lower() for ing in item["ingredients"])):
-                results.append(MenuItem(**item))
+            if fields.matches_text(query):
+                results.append(item)
 
         return results
 
@@ -179,10 +311,8 @@ class MenuService:
 
     async def get_item_by_id(self, item_id: str) -> Optional[MenuItem]:
         """Get a specific menu item by ID"""
-        for item in self.menu_items:
-            if item.id == item_id and item.available:
-                return item
-        return None
+        item = self._items_by_id.get(item_id)
+        return item if item is not None and item.available else None
 
     async def search_items(
         self,
@@ -195,76 +325,68 @@ class MenuService:
         max_spice_level: Optional[int] = None
     ) -> List[MenuItem]:
         """Search menu items based on various criteria"""
-        results = []
+        query_lower = query.lower() if query else None
+        requested_tags = frozenset(tag.lower() for tag in dietary_tags) if dietary_tags else None
+
+        # Numeric and enum filters as one vectorized mask, cheapest checks first
+        mask = self._available_col.copy()
         
-        for item in self.menu_items:
-            if not item.available:
-                continue
-                
-            # Text search in name and description
-            if query:
-                query_lower = query.lower()
-                if not (query_lower in item.name.lower() or 
-                       query_lower in item.description.lower() or
-                       any(query_lower in ingredient.lower() for ingredient in item.ingredients)):
-                    continue
+        # Category filter
+        if category:
+            mask &= self._category_col == self._category_codes.get(category.lower(), -1)
             
-            # Category filter
-            if category:
-                item_category = item.category.value if hasattr(item.category, 'value') else str(item.category)
-                if item_category.lower() != category.lower():
-                    continue
-                
-            # Cuisine type filter
-            if cuisine_type:
-                item_cuisine = item.cuisine_type.value if hasattr(item.cuisine_type, 'value') else str(item.cuisine_type)
-                if item_cuisine.lower() != cuisine_type.lower():
-                    continue
-                
-            # Dietary tags filter
-            if dietary_tags:
-                if not any(tag.lower() in [dt.lower() for dt in item.dietary_tags] for tag in dietary_tags):
-                    continue
+        # Cuisine type filter
+        if cuisine_type:
+            mask &= self._cuisine_col == self._cuisine_codes.get(cuisine_type.lower(), -1)
+        
+        # Price range filter
+        if max_price:
+            mask &= self._price_col <= max_price
+        if min_price:
+            mask &= self._price_col >= min_price
             
-            # Price range filter
-            if max_price and item.price > max_price:
-                continue
-            if min_price and item.price < min_price:
+        # Spice level filter
+        if max_spice_level:
+            mask &= self._spice_col <= max_spice_level
+
+        # Text search candidates from the trigram index
+        text_positions = self._text_positions(query_lower)
+        if text_positions is not None:
+            text_mask = np.zeros_like(mask)
+            text_mask[text_positions] = True
+            mask &= text_mask
+
+        positions = np.flatnonzero(mask)
+        # Sort by popularity score (descending), ties in menu order
+        positions = positions[np.argsort(-self._popularity_col[positions], kind="stable")]
+
+        results = []
+        for i in positions:
+            item, fields = self._search_fields[i]
+
+            # Dietary tags filter
+            if requested_tags and requested_tags.isdisjoint(fields.dietary_tags):
                 continue
-                
-            # Spice level filter
-            if max_spice_level and item.spice_level > max_spice_level:
+
+            # Text search in name and description (costliest check, so last)
+            if query_lower and not fields.matches_text(query_lower):
                 continue
                 
             results.append(item)
         
-        # Sort by popularity score (descending)
-        results.sort(key=lambda x: x.popularity_score, reverse=True)
         return results
 
     async def get_categories(self) -> List[str]:
         """Get all available categories"""
-        categories = set()
-        for item in self.menu_items:
-            if item.available:
-                categories.add(item.category)
-        return sorted(list(categories))
+        return list(self._categories)
 
     async def get_cuisine_types(self) -> List[str]:
         """Get all available cuisine types"""
-        cuisines = set()
-        for item in self.menu_items:
-            if item.available:
-                cuisines.add(item.cuisine_type)
-        return sorted(list(cuisines))
+        return list(self._cuisine_types)
 
     async def get_dietary_tags(self) -> List[str]:
         """Get all available dietary tags"""
-        tags = set()
-        for item in self.menu_items:
-            if item.available:
-                tags.update(item.dietary_tags)
-        return sorted(list(tags))
+        return list(self._dietary_tags)
 
     def get_ingredients_info(self, ingredient_name: str) -> Optional[Dict[str, Any]]:
         """Get detailed information about an ingredient"""
@@ -286,29 +408,17 @@ class MenuService:
 
     def get_popular_items(self, limit: int = 5) -> List[MenuItem]:
         """Get the most popular menu items"""
-        items = self.menu_data.get("items", [])
-        # Sort by popularity (assuming there's a 'popularity' field)
         sorted_items = sorted(
-            items,
-            key=lambda x: x.get("popularity", 0),
+            self.menu_items,
+            key=lambda x: x.popularity_score,
             reverse=True
         )
-        return [MenuItem(**item) for item in sorted_items[:limit]]
+        return sorted_items[:limit]
 
     def get_special_items(self) -> List[MenuItem]:
         """Get items that are currently on special"""
         current_time = datetime.now()
-        special_items = []
-
-        for item in self.menu_data.get("items", []):
-            if "special" in item:
-                special = item["special"]
-                if (special.get("is_active", False) and
-                    current_time >= datetime.fromisoformat(special.get("start_time", "2000-01-01")) and
-                    current_time <= datetime.fromisoformat(special.get("end_time", "2100-01-01"))):
-                    special_items.append(MenuItem(**item))
-
-        return special_items 
+        return [item for item, start, end in self._specials if start <= current_time <= end] 
 
     # Image-related methods removed with Cloudinary
 
@@ -325,11 +435,12 @@ class MenuService:
 
     def get_menu_item_with_images(self, menu_item_id: str) -> Optional[MenuItem]:
         """Get menu item with image information"""
-        return next((item for item in self.menu_items if item.id == menu_item_id), None)
+        return self._items_by_id.get(menu_item_id)
 
     def get_menu_items_by_category_with_images(self, category: str) -> List[MenuItem]:
         """Get menu items by category with image information"""
+        category = category.lower()
         return [
-            item for item in self.menu_items 
-            if item.available and item.category.value.lower() == category.lower()
+            item for item, fields in self._search_fields
+            if item.available and fields.category == category
         ] 
\ No newline at end of file
@@ -1,35 +1,118 @@
+import httpx
 import ollama
 import re
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Optional
+from tenacity import (
+    AsyncRetrying, RetryCallState, retry_if_exception,
+    stop_after_attempt, wait_exponential_jitter
+)
 from app.config import settings
 from loguru import logger
 
+# Leading/trailing markdown code fences (optionally tagged ```json)
+_CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.MULTILINE)
+
+def _is_transient(error: BaseException) -> bool:
+    """
+    Only transient failures are worth another attempt: dropped or refused
+    connections, server errors and rate limiting. Other ResponseErrors
+    (bad request, model not pulled) would fail the same way again.
+    """
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code >= 500 or error.status_code == 429
+    return isinstance(error, httpx.TransportError)
+
+def _log_retry(retry_state: RetryCallState):
+    """tenacity before_sleep hook: log each failed attempt and the wait before the next"""
+    logger.warning(
+        "Ollama attempt {}/{} failed after {:.0f}ms ({}), retrying in {:.1f}s",
+        retry_state.attempt_number, settings.retry_attempts,
+        (retry_state.seconds_since_start or 0) * 1000,
+        type(retry_state.outcome.exception()).__name__,
+        retry_state.next_action.sleep
+    )
+
 class OllamaService:
     def __init__(self):
-        self.client = ollama.AsyncClient(host=settings.OLLAMA_BASE_URL)
+        # One long-lived client (and connection pool) for all Ollama calls, so
+        # keep-alive connections are reused across requests
+        self.client = ollama.AsyncClient(
+            host=settings.OLLAMA_BASE_URL,
+            # Bounds each connect and each read, so a stalled server can't hold
+            # a request (or a stream between chunks) open forever
+            timeout=httpx.Timeout(
+                settings.ollama_timeout_seconds,
+                connect=settings.ollama_connect_timeout_seconds
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.ollama_max_connections,
+                max_keepalive_connections=settings.ollama_max_keepalive_connections,
+                keepalive_expiry=settings.ollama_keepalive_expiry_seconds
+            )
+        )
 
     def _clean_llm_json(self, text: str) -> str:
         # Remove code block markers and language tags
-        cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip(), flags=re.MULTILINE)
-        return cleaned
+        return _CODE_FENCE_RE.sub("", text.strip())
 
-    async def generate(self, prompt: str, context: Optional[str] = None) -> str:
+    async def generate(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
         try:
             full_prompt = f"{context}\n\n{prompt}" if context else prompt
 
-            response = await self.client.generate(
-                model=settings.ollama_model,
-                prompt=full_prompt,
-                options={
-                    'temperature': 0.7,
-                    'num_predict': 1000,
-                }
-            )
+            # The backoff between attempts is an asyncio.sleep, so other requests
+            # keep running; the caller's deadline bounds all attempts together
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(settings.retry_attempts),
+                wait=wait_exponential_jitter(initial=1, max=settings.retry_max_wait),
+                retry=retry_if_exception(_is_transient),
+                before_sleep=_log_retry,
+                reraise=True
+            ):
+                with attempt:
+                    response = await self.client.generate(
+                        model=settings.ollama_model,
+                        prompt=full_prompt,
+                        # This client version only supports free-form JSON mode, not a schema
+                        format='json' if response_schema else '',
+                        options={
+                            'temperature': settings.temperature,
+                            'num_predict': settings.max_tokens,
+                        }
+                    )
 
-            # Clean the response before returning
+            # JSON mode already guarantees bare JSON; only free text may be fenced
+            if response_schema:
+                return response['response']
             cleaned_response = self._clean_llm_json(response['response'])
             return cleaned_response
 
         except Exception as e:
             logger.error(f"Ollama generation failed: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    async def stream(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Yield response text chunks as Ollama produces them"""
+        full_prompt = f"{context}\n\n{prompt}" if context else prompt
+
+        async for part in await self.client.generate(
+            model=settings.ollama_model,
+            prompt=full_prompt,
+            format='json' if response_schema else '',
+            options={
+                'temperature': settings.temperature,
+                'num_predict': settings.max_tokens,
+            },
+            stream=True
+        ):
+            if part.get('response'):
+                yield part['response']
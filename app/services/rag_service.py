@@ -1,52 +1,84 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
+import orjson
+from cachetools import LRUCache
 from loguru import logger
-import json
 from datetime import datetime
 
 from app.models.schemas import MenuItem
 from app.services.menu_service import MenuService
 from app.config import settings
+from app.utils.helpers import load_json_cached
+
+_EMBEDDING_DIM = 384
+_RELEVANT_ITEMS_LIMIT = 3  # Menu matches returned with an answer
+_MENU_EMBEDDINGS_PATH = "data/menu_embeddings.json"
+
+def _normalized_matrix(embeddings: Any) -> np.ndarray:
+    """Stack embeddings as float32 rows scaled to unit length (zero rows stay zero)"""
+    if len(embeddings) == 0:
+        return np.zeros((0, _EMBEDDING_DIM), dtype=np.float32)
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+def _normalized(vector: List[float]) -> np.ndarray:
+    q = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(q)
+    return q / norm if norm > 0 else q
 
 class RAGService:
     def __init__(self, menu_service: MenuService):
         self.menu_service = menu_service
-        self.menu_embeddings = self._load_menu_embeddings()
         self.qa_pairs = self._load_qa_pairs()
+        # Normalized query embeddings by question text; repeated questions
+        # skip the embedding model
+        self._query_cache: LRUCache = LRUCache(maxsize=1024)
+        # Unit-length embedding matrices, so scoring a query against every
+        # row is a single matrix-vector product
+        menu_ids, menu_embeddings = self._load_menu_embeddings()
+        self._menu_ids, self._menu_matrix = menu_ids, _normalized_matrix(menu_embeddings)
+        self._qa_matrix = self._build_qa_matrix()
 
-    def _load_menu_embeddings(self) -> Dict[str, List[float]]:
-        """Load pre-computed menu item embeddings"""
+    def _load_menu_embeddings(self) -> Tuple[List[str], np.ndarray]:
+        """Load pre-computed menu item embeddings as item ids and a float32 matrix"""
         try:
-            with open("data/menu_embeddings.json", "r") as f:
-                return json.load(f)
+            embeddings = load_json_cached(_MENU_EMBEDDINGS_PATH)
+            ids = list(embeddings)
+            return ids, np.asarray([embeddings[i] for i in ids], dtype=np.float32)
         except Exception as e:
             logger.error(f"Error loading menu embeddings: {str(e)}")
-            return {}
+            return [], np.zeros((0, _EMBEDDING_DIM), dtype=np.float32)
 
     def _load_qa_pairs(self) -> List[Dict[str, Any]]:
         """Load pre-defined Q&A pairs"""
         try:
-            with open("data/qa_pairs.json", "r") as f:
-                return json.load(f)
+            # Copied: add_qa_pair appends to this list
+            return list(load_json_cached("data/qa_pairs.json"))
+        except FileNotFoundError:
+            return []
+        except orjson.JSONDecodeError as e:
+            if not e.doc.strip():
+                # Blank until add_qa_pair writes the first pair
+                return []
+            logger.error(f"Error loading Q&A pairs: {str(e)}")
+            return []
         except Exception as e:
             logger.error(f"Error loading Q&A pairs: {str(e)}")
             return []
 
-    def _compute_similarity(
-        self,
-        query_embedding: List[float],
-        item_embedding: List[float]
-    ) -> float:
-        """Compute cosine similarity between query and item embeddings"""
-        try:
-            query_norm = np.linalg.norm(query_embedding)
-            item_norm = np.linalg.norm(item_embedding)
-            if query_norm == 0 or item_norm == 0:
-                return 0
-            return np.dot(query_embedding, item_embedding) / (query_norm * item_norm)
-        except Exception as e:
-            logger.error(f"Error computing similarity: {str(e)}")
-            return 0
+    def _build_qa_matrix(self) -> np.ndarray:
+        return _normalized_matrix([self._get_embedding(qa["question"]) for qa in self.qa_pairs])
+
+    def _query_vector(self, text: str) -> np.ndarray:
+        """Unit-length embedding of text, cached per distinct text"""
+        vector = self._query_cache.get(text)
+        if vector is None:
+            vector = _normalized(self._get_embedding(text))
+            vector.flags.writeable = False
+            self._query_cache[text] = vector
+        return vector
 
     async def get_menu_qa(
         self,
@@ -55,32 +87,19 @@ class RAGService:
     ) -> Dict[str, Any]:
         """Get answer to a question about the menu"""
         try:
+            query = self._query_vector(question)
+
             # First, check if there's a direct match in Q&A pairs
-            for qa_pair in self.qa_pairs:
-                if self._compute_similarity(
-                    self._get_embedding(question),
-                    self._get_embedding(qa_pair["question"])
-                ) > 0.8:  # High similarity threshold
-                    return {
-                        "answer": qa_pair["answer"],
-                        "confidence": 1.0,
-                        "source": "qa_pairs"
-                    }
+            qa_matches = self._qa_matrix @ query > 0.8  # High similarity threshold
+            if qa_matches.any():
+                return {
+                    "answer": self.qa_pairs[int(qa_matches.argmax())]["answer"],
+                    "confidence": 1.0,
+                    "source": "qa_pairs"
+                }
 
             # If no direct match, search through menu items
-            relevant_items = []
-            for item_id, embedding in self.menu_embeddings.items():
-                similarity = self._compute_similarity(
-                    self._get_embedding(question),
-                    embedding
-                )
-                if similarity > 0.5:  # Lower threshold for menu items
-                    item = self.menu_service.get_menu_item_by_id(item_id)
-                    if item:
-                        relevant_items.append((item, similarity))
-
-            # Sort by similarity
-            relevant_items.sort(key=lambda x: x[1], reverse=True)
+            relevant_items = self._top_menu_items(self._menu_matrix @ query, _RELEVANT_ITEMS_LIMIT)
 
             if not relevant_items:
                 return {
@@ -103,7 +122,7 @@ class RAGService:
                         "name": item.name,
                         "similarity": sim
                     }
-                    for item, sim in relevant_items[:3]
+                    for item, sim in relevant_items
                 ]
             }
 
@@ -115,11 +134,39 @@ class RAGService:
                 "source": "error"
             }
 
+    def _top_menu_items(self, sims: np.ndarray, limit: int) -> List[Tuple[MenuItem, float]]:
+        """The `limit` most similar menu items above the menu threshold, best first"""
+        candidates = np.flatnonzero(sims > 0.5)  # Lower threshold for menu items
+        if candidates.size > limit:
+            # Only the head is needed: select it in O(N), then sort just that
+            head = candidates[np.argpartition(-sims[candidates], limit - 1)[:limit]]
+            relevant_items = self._menu_items_by_similarity(head, sims, limit)
+            if len(relevant_items) == limit:
+                return relevant_items
+            # Part of the head had no menu item (stale embeddings); rank them all
+        return self._menu_items_by_similarity(candidates, sims, limit)
+
+    def _menu_items_by_similarity(
+        self,
+        positions: np.ndarray,
+        sims: np.ndarray,
+        limit: int
+    ) -> List[Tuple[MenuItem, float]]:
+        relevant_items = []
+        # Sort by similarity
+        for i in positions[np.argsort(-sims[positions], kind="stable")]:
+            item = self.menu_service.get_menu_item_by_id(self._menu_ids[i])
+            if item:
+                relevant_items.append((item, float(sims[i])))
+                if len(relevant_items) == limit:
+                    break
+        return relevant_items
+
     def _get_embedding(self, text: str) -> List[float]:
         """Get embedding for a text (placeholder - would use actual embedding model)"""
         # This is a placeholder - in a real implementation, you would use
         # a proper embedding model like sentence-transformers
-        return [0.0] * 384  # Example dimension
+        return [0.0] * _EMBEDDING_DIM
 
     def _generate_answer(
         self,
@@ -175,18 +222,18 @@ class RAGService:
         """Update menu item embeddings"""
         try:
             menu_items = self.menu_service.get_all_menu_items()
-            new_embeddings = {}
-
-            for item in menu_items:
-                # Generate embedding for item name and description
-                item_text = f"{item.name} {item.description}"
-                new_embeddings[item.id] = self._get_embedding(item_text)
+            # Generate embedding for item name and description, as one float32 matrix
+            embeddings = np.asarray(
+                [self._get_embedding(f"{item.name} {item.description}") for item in menu_items],
+                dtype=np.float32
+            )
+            ids = [item.id for item in menu_items]
 
-            # Save updated embeddings
-            with open("data/menu_embeddings.json", "w") as f:
-                json.dump(new_embeddings, f, indent=2)
+            # Save updated embeddings; orjson writes the numpy rows directly
+            with open(_MENU_EMBEDDINGS_PATH, "wb") as f:
+                f.write(orjson.dumps(dict(zip(ids, embeddings)), option=orjson.OPT_SERIALIZE_NUMPY))
 
-            self.menu_embeddings = new_embeddings
+            self._menu_ids, self._menu_matrix = ids, _normalized_matrix(embeddings)
             logger.info("Menu embeddings updated successfully")
 
         except Exception as e:
@@ -209,10 +256,11 @@ class RAGService:
             }
 
             self.qa_pairs.append(new_pair)
+            self._qa_matrix = self._build_qa_matrix()
 
             # Save updated Q&A pairs
-            with open("data/qa_pairs.json", "w") as f:
-                json.dump(self.qa_pairs, f, indent=2)
+            with open("data/qa_pairs.json", "wb") as f:
+                f.write(orjson.dumps(self.qa_pairs))
 
             logger.info("Q&A pair added successfully")
 
@@ -0,0 +1,97 @@
+from typing import Any, Dict, Optional
+import asyncio
+import copy
+import hashlib
+import numpy as np
+from loguru import logger
+
+class SemanticCache:
+    """
+    Response cache that also matches paraphrases: prompts are embedded
+    (L2-normalized) and a cached entry is reused when its cosine similarity
+    to the query reaches `threshold` within the same bucket.
+
+    Entries live in a preallocated ring buffer, so a lookup is a single
+    matrix-vector product over at most `max_entries` rows. Buckets keep
+    prompts that only match under different conditions (e.g. other user
+    preferences) from colliding.
+
+    sentence-transformers is an optional dependency; without it (or with
+    the cache disabled) `enabled` is False and callers skip the cache.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        threshold: float,
+        max_entries: int,
+        enabled: bool = True
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._model = None
+        if enabled:
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(model_name)
+                logger.info(f"Semantic cache enabled with model: {model_name}")
+            except Exception as e:
+                logger.warning(f"Semantic cache disabled: {e}")
+
+        dim = self._model.get_sentence_embedding_dimension() if self._model else 0
+        self._embeddings = np.zeros((max_entries, dim), dtype=np.float32)
+        self._buckets = np.zeros(max_entries, dtype=np.int64)
+        self._entries: list = [None] * max_entries
+        self._size = 0
+        self._next = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._model is not None
+
+    @staticmethod
+    def bucket(key: str) -> int:
+        """Stable integer id for a bucket key"""
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big", signed=True)
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embed text off the event loop (encoding is CPU-bound)"""
+        embedding = await asyncio.to_thread(self._model.encode, text, normalize_embeddings=True)
+        return embedding.astype(np.float32)
+
+    def lookup(self, bucket: int, embedding: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Copy of the most similar cached entry in bucket at or above the
+        threshold, else None. Copied so callers in different sessions never
+        share (and mutate) the same nested dicts.
+        """
+        if self._size:
+            sims = self._embeddings[:self._size] @ embedding
+            sims[self._buckets[:self._size] != bucket] = -1.0
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                self.hits += 1
+                return copy.deepcopy(self._entries[best])
+        self.misses += 1
+        return None
+
+    def store(self, bucket: int, embedding: np.ndarray, value: Dict[str, Any]):
+        """Add an entry, overwriting the oldest one once the buffer is full"""
+        slot = self._next
+        self._embeddings[slot] = embedding
+        self._buckets[slot] = bucket
+        self._entries[slot] = value
+        self._next = (slot + 1) % self.max_entries
+        self._size = min(self._size + 1, self.max_entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "size": self._size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,24 @@
+from functools import lru_cache
+from typing import Any
+import mmap
+import os
+
+import orjson
+
+@lru_cache(maxsize=8)
+def _parse_json_file(path: str, mtime_ns: int) -> Any:
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap can't map an empty file; let orjson report it as invalid JSON
+            return orjson.loads(b"")
+        # mmap + memoryview lets orjson parse the file pages directly without an
+        # intermediate bytes copy
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
+
+def load_json_cached(path: str) -> Any:
+    """
+    Parse a JSON file, reusing the previous result while the file's mtime is
+    unchanged. The result is shared between callers, so treat it as read-only.
+    """
+    return _parse_json_file(os.path.abspath(path), os.stat(path).st_mtime_ns)
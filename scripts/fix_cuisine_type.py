@@ -1,5 +1,7 @@
 import json
 import os
+import shutil
+import tempfile
 
 # Path to your menu_data.json file
 menu_data_path = os.path.join(os.path.dirname(__file__), '../data/menu_data.json')
@@ -8,11 +10,11 @@ menu_data_path = os.path.join(os.path.dirname(__file__), '../data/menu_data.json
 with open(menu_data_path, 'r', encoding='utf-8') as f:
     menu_data = json.load(f)
 
-# List of valid cuisine types (lowercase, matching your Enum)
-valid_cuisines = [
+# Valid cuisine types (lowercase, matching your Enum)
+valid_cuisines = frozenset({
     "italian", "mexican", "japanese", "chinese", "swahili", "indian", "french", "american",
     "mediterranean", "thai", "korean", "greek", "spanish", "lebanese", "turkish", "other"
-]
+})
 
 def fix_cuisine_type(item):
     cuisine = item.get("cuisine_type", "other")
@@ -27,8 +29,18 @@ def fix_cuisine_type(item):
 for item in menu_data.get("items", []):
     fix_cuisine_type(item)
 
-# Save the fixed menu data
-with open(menu_data_path, 'w', encoding='utf-8') as f:
-    json.dump(menu_data, f, indent=2, ensure_ascii=False)
+# Save the fixed menu data to a temp file and swap it in, so an interrupted
+# run never leaves a truncated menu_data.json behind
+menu_dir = os.path.dirname(os.path.abspath(menu_data_path))
+f = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=menu_dir, suffix='.tmp', delete=False)
+try:
+    with f:
+        json.dump(menu_data, f, indent=2, ensure_ascii=False)
+    # Temp files are created 0600; keep the original file's permissions
+    shutil.copymode(menu_data_path, f.name)
+    os.replace(f.name, menu_data_path)
+except BaseException:
+    os.unlink(f.name)
+    raise
 
 print("Cuisine types have been fixed to match the Enum values.")
@@ -0,0 +1,4 @@
+import os
+
+# app.config requires a Gemini key at import time; tests never call Gemini
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
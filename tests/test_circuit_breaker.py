@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+
+def make_breaker(**overrides) -> CircuitBreaker:
+    options = dict(
+        name="test",
+        failure_threshold=3,
+        recovery_seconds=30.0,
+        max_recovery_seconds=300.0,
+        window_seconds=60.0,
+        failure_rate=0.5
+    )
+    options.update(overrides)
+    return CircuitBreaker(**options)
+
+def trip(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.release(breaker.acquire(), RuntimeError("boom"))
+    assert breaker.state == CircuitState.OPEN
+
+def end_cooldown(breaker: CircuitBreaker):
+    breaker.opened_at -= breaker.max_recovery_seconds + 1
+
+async def fail():
+    await asyncio.sleep(0.01)
+    raise RuntimeError("boom")
+
+async def succeed():
+    await asyncio.sleep(0.01)
+    return "ok"
+
+def test_trips_once_threshold_and_rate_are_reached():
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.release(breaker.acquire())
+    for _ in range(3):
+        breaker.release(breaker.acquire(), RuntimeError("boom"))
+    # 3 failures out of 7 calls is under the failure rate
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.release(breaker.acquire(), RuntimeError("boom"))
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.consecutive_opens == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+def test_in_flight_failures_do_not_re_trip():
+    async def scenario():
+        breaker = make_breaker()
+        results = await asyncio.gather(*(breaker.call(fail) for _ in range(8)), return_exceptions=True)
+        return breaker, results
+
+    breaker, results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.consecutive_opens == 1
+    assert breaker._cooldown() == breaker.recovery_seconds
+
+def test_stale_success_does_not_close_an_open_circuit():
+    async def scenario():
+        breaker = make_breaker()
+        slow = asyncio.create_task(breaker.call(succeed))
+        await asyncio.sleep(0)
+        trip(breaker)
+        assert await slow == "ok"
+        return breaker
+
+    breaker = asyncio.run(scenario())
+    assert breaker.state == CircuitState.OPEN
+
+def test_half_open_admits_a_single_probe_that_closes_on_success():
+    breaker = make_breaker()
+    trip(breaker)
+    end_cooldown(breaker)
+
+    probing = breaker.acquire()
+    assert probing
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert not breaker.allows_request()
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    breaker.release(probing)
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.consecutive_opens == 0
+    assert not breaker.probe_inflight
+
+def test_failed_probe_re_opens_with_a_longer_cooldown():
+    breaker = make_breaker()
+    trip(breaker)
+    end_cooldown(breaker)
+
+    breaker.release(breaker.acquire(), RuntimeError("still down"))
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.consecutive_opens == 2
+    assert breaker._cooldown() == 2 * breaker.recovery_seconds
+    assert not breaker.allows_request()
+
+def test_cancelled_probe_hands_the_probe_back():
+    async def scenario():
+        breaker = make_breaker()
+        trip(breaker)
+        end_cooldown(breaker)
+        probe = asyncio.create_task(breaker.call(asyncio.sleep, 10))
+        await asyncio.sleep(0)
+        assert breaker.state == CircuitState.HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return breaker
+
+    breaker = asyncio.run(scenario())
+    # Not the provider's fault: the circuit stays OPEN, the cooldown is not
+    # extended and the next caller may probe
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.consecutive_opens == 1
+    assert not breaker.probe_inflight
+    assert breaker.allows_request()
+
+def test_reset_closes_the_circuit():
+    breaker = make_breaker()
+    trip(breaker)
+    breaker.reset()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.get_stats()["failures"] == 0
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.llm_service import LLMService
+
+class FakeProvider:
+    """Provider service stub that answers after `delay` seconds (or raises `error`)"""
+
+    def __init__(self, answer: str, delay: float = 0.0, error: Exception = None):
+        self.answer = answer
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate(self, prompt, context=None, response_schema=None):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.answer
+
+@pytest.fixture(autouse=True)
+def fast_hedge(monkeypatch):
+    monkeypatch.setattr(settings, "hedge_after_ms", 20)
+    monkeypatch.setattr(settings, "use_ollama_fallback", True)
+    monkeypatch.setattr(settings, "race_providers_enabled", False)
+
+def run_with(gemini: FakeProvider, ollama: FakeProvider, scenario):
+    async def main():
+        service = LLMService()
+        service.gemini_service = gemini
+        service.ollama_service = ollama
+        try:
+            return await scenario(service)
+        finally:
+            await service.aclose()
+    return asyncio.run(main())
+
+def test_fast_primary_wins_without_hedging():
+    gemini, ollama = FakeProvider("gemini"), FakeProvider("ollama")
+    result = run_with(gemini, ollama, lambda s: s.generate_response("hi", use_cache=False))
+    assert result["provider"] == "gemini"
+    assert ollama.calls == 0
+
+def test_slow_primary_is_hedged_and_the_loser_cancelled():
+    gemini, ollama = FakeProvider("gemini", delay=5), FakeProvider("ollama", delay=0.01)
+    result = run_with(gemini, ollama, lambda s: s.generate_response("hi", use_cache=False))
+    assert result["response"] == "ollama"
+    assert result["fallback_used"]
+    assert gemini.cancelled == 1
+
+def test_failed_primary_falls_back():
+    gemini = FakeProvider("gemini", error=RuntimeError("down"))
+    ollama = FakeProvider("ollama")
+    result = run_with(gemini, ollama, lambda s: s.generate_response("hi", use_cache=False))
+    assert result["provider"] == "ollama"
+
+def test_lost_hedge_does_not_count_against_the_loser():
+    gemini, ollama = FakeProvider("gemini", delay=5), FakeProvider("ollama", delay=0.01)
+
+    async def scenario(service):
+        await service.generate_response("hi", use_cache=False)
+        return service.gemini_breaker.get_stats()
+
+    stats = run_with(gemini, ollama, scenario)
+    assert stats["state"] == "closed"
+    assert stats["failures"] == 0
+
+def test_caller_cancelled_mid_hedge_cancels_both_requests():
+    gemini, ollama = FakeProvider("gemini", delay=5), FakeProvider("ollama", delay=5)
+
+    async def scenario(service):
+        call = asyncio.create_task(service.generate_response("hi", use_cache=False))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+    run_with(gemini, ollama, scenario)
+    assert (gemini.cancelled, ollama.cancelled) == (1, 1)
+
+def test_identical_overlapping_prompts_share_one_call():
+    gemini, ollama = FakeProvider("gemini"), FakeProvider("ollama")
+
+    async def scenario(service):
+        return await asyncio.gather(*(service.generate_response("same") for _ in range(3)))
+
+    results = run_with(gemini, ollama, scenario)
+    assert [r["response"] for r in results] == ["gemini"] * 3
+    assert gemini.calls == 1
+
+def test_one_caller_leaving_does_not_cancel_the_shared_call(monkeypatch):
+    monkeypatch.setattr(settings, "hedge_after_ms", 1000)
+    gemini, ollama = FakeProvider("gemini", delay=0.05), FakeProvider("ollama")
+
+    async def scenario(service):
+        leaving = asyncio.create_task(service.generate_response("same"))
+        staying = asyncio.create_task(service.generate_response("same"))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        return await staying
+
+    result = run_with(gemini, ollama, scenario)
+    assert result["response"] == "gemini"
+    assert gemini.calls == 1
+    assert gemini.cancelled == 0